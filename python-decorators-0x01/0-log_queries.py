@@ -1,22 +1,46 @@
 import sqlite3
 import functools
+import inspect
+import logging
 from datetime import datetime
+from query_metrics import instrument_queries, query_stats
+from row_stream import DEFAULT_ARRAYSIZE, RowIterator
+
+logger = logging.getLogger(__name__)
 
 def log_queries(func):
+    # The SQL text is only formatted when DEBUG logging is on; latency goes to
+    # query_metrics (histograms per statement fingerprint + slow-query log).
+    timed = instrument_queries(func)
+
+    def log(args, kwargs):
+        if logger.isEnabledFor(logging.DEBUG):
+            query = kwargs.get('query') or (args[0] if args else None)
+            logger.debug("Executing query: %s", query)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            log(args, kwargs)
+            return await timed(*args, **kwargs)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        query = kwargs.get('query') or (args[0] if args else None)
-        print(f"Executing query: {query}")
-        return func(*args, **kwargs)
+        log(args, kwargs)
+        return timed(*args, **kwargs)
     return wrapper
 
 @log_queries
-def fetch_all_users(query):
+def fetch_all_users(query, stream=False, arraysize=DEFAULT_ARRAYSIZE):
     conn = sqlite3.connect('users.db')
     cursor = conn.cursor()
     cursor.execute(query)
+    if stream:
+        return RowIterator(cursor, arraysize, on_close=conn.close)
     results = cursor.fetchall()
     conn.close()
     return results
 
-users = fetch_all_users(query="SELECT * FROM users")
\ No newline at end of file
+users = fetch_all_users(query="SELECT * FROM users")
+print(query_stats.report())
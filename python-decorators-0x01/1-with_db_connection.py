@@ -1,7 +1,17 @@
 import sqlite3 
 import functools
+import inspect
+from sqlite_pool import with_pooled_connection
 
 def with_db_connection(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            import aiosqlite
+            async with aiosqlite.connect('users.db') as conn:
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         conn = sqlite3.connect('users.db')
@@ -12,7 +22,7 @@ def with_db_connection(func):
             conn.close()
     return wrapper
 
-@with_db_connection 
+@with_pooled_connection 
 def get_user_by_id(conn, user_id): 
     cursor = conn.cursor() 
     cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,)) 
@@ -1,18 +1,20 @@
-import sqlite3 
 import functools
-
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
-    return wrapper
+import inspect
+from group_commit import group_commit
 
 def transactional(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(conn, *args, **kwargs):
+            try:
+                result = await func(conn, *args, **kwargs)
+                await conn.commit()
+                return result
+            except Exception as e:
+                await conn.rollback()
+                raise e
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
         try:
@@ -24,8 +26,7 @@ def transactional(func):
             raise e
     return wrapper
 
-@with_db_connection 
-@transactional 
+@group_commit
 def update_user_email(conn, user_id, new_email): 
     cursor = conn.cursor() 
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
@@ -1,40 +1,77 @@
+import asyncio
 import time
-import sqlite3 
 import functools
+import inspect
+from sqlite_pool import with_pooled_connection
+from row_stream import DEFAULT_ARRAYSIZE, RowIterator
+from retry_policy import backoff_delay, is_transient, retry_budget, retry_metrics
 
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
-    return wrapper
+def retry_on_failure(retries=3, delay=2, max_delay=30, retry_if=is_transient, budget=None, metrics=None):
+    # `retries` is the total number of attempts. Only errors accepted by
+    # retry_if are retried, after a full-jitter exponential backoff starting
+    # at `delay` seconds; each retry also needs a token from the retry budget.
+    def next_pause(error, attempt, current_budget, current_metrics):
+        # Seconds to wait before the next attempt, or None to re-raise.
+        if not retry_if(error):
+            return None
+        if attempt == retries - 1:
+            current_metrics.add(gave_up=1)
+            return None
+        if not current_budget.try_spend():
+            current_metrics.add(budget_exhausted=1, gave_up=1)
+            return None
+        pause = backoff_delay(attempt, delay, max_delay)
+        current_metrics.add(retries=1, sleep_seconds=pause)
+        return pause
 
-def retry_on_failure(retries=3, delay=2):
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                current_budget = budget or retry_budget
+                current_metrics = metrics or retry_metrics
+                current_metrics.add(calls=1)
+                for attempt in range(retries):
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        pause = next_pause(e, attempt, current_budget, current_metrics)
+                        if pause is None:
+                            raise
+                        await asyncio.sleep(pause)
+                    else:
+                        current_budget.record_success()
+                        return result
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
+            current_budget = budget or retry_budget
+            current_metrics = metrics or retry_metrics
+            current_metrics.add(calls=1)
             for attempt in range(retries):
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
-                    last_exception = e
-                    if attempt < retries - 1:
-                        time.sleep(delay)
-            raise last_exception
+                    pause = next_pause(e, attempt, current_budget, current_metrics)
+                    if pause is None:
+                        raise
+                    time.sleep(pause)
+                else:
+                    current_budget.record_success()
+                    return result
         return wrapper
     return decorator
 
-@with_db_connection
+@with_pooled_connection
 @retry_on_failure(retries=3, delay=1)
-def fetch_users_with_retry(conn):
+def fetch_users_with_retry(conn, stream=False, arraysize=DEFAULT_ARRAYSIZE):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users")
+    if stream:
+        return RowIterator(cursor, arraysize)
     return cursor.fetchall()
 
 users = fetch_users_with_retry()
-print(users)
\ No newline at end of file
+print(users)
+print(retry_metrics.snapshot())
@@ -1,36 +1,260 @@
 import time
-import sqlite3 
 import functools
+import inspect
+from sqlite_pool import default_pool, get_async_pool, with_pooled_connection
+import asyncio
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from row_stream import DEFAULT_ARRAYSIZE, RowIterator
 
-query_cache = {}
-
-def cache_query(func):
-    @functools.wraps(func)
-    def wrapper(conn, query):
-        if query in query_cache:
-            print("Returning cached result")
-            return query_cache[query]
-        result = func(conn, query)
-        query_cache[query] = result
-        return result
-    return wrapper
+def estimate_size(value):
+    # Rough in-memory footprint of a query result (lists/tuples of scalars).
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return size
+
+class QueryCache:
+    """LRU cache bounded by entry count and total bytes, with a TTL per entry."""
+
+    def __init__(self, maxsize=256, maxbytes=64 * 1024 * 1024, ttl=300):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        found, value, _ = self.lookup(key)
+        return found, value
+
+    def lookup(self, key, stale_ttl=0):
+        # Returns (found, value, stale). An entry expired less than stale_ttl
+        # seconds ago is still returned, flagged as stale.
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry[0] + stale_ttl > now:
+                self._entries.move_to_end(key)
+                stale = entry[0] <= now
+                if stale:
+                    self.stale_hits += 1
+                else:
+                    self.hits += 1
+                return True, entry[2], stale
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return False, None, False
+
+    def set(self, key, value, ttl=None):
+        size = estimate_size(value)
+        if size > self.maxbytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            while len(self._entries) > self.maxsize or self._bytes > self.maxbytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+class SingleFlight:
+    """In-flight loads by key, so concurrent misses share a single query."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def join(self, key, factory=Future):
+        # Returns (future, leader). Only the leader runs the load; everyone
+        # else waits on the future it will complete.
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = factory()
+            return future, True
+
+    def finish(self, key, result=None, error=None):
+        with self._lock:
+            future = self._calls.pop(key)
+        if isinstance(error, asyncio.CancelledError) and isinstance(future, asyncio.Future):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+            future.exception()  # mark retrieved even if nobody was waiting
+        else:
+            future.set_result(result)
+
+query_cache = QueryCache()
+query_flights = SingleFlight()
+_refresh_tasks = set()
+
+def cache_query(func=None, *, cache=None, ttl=None, stale_ttl=0, pool=None):
+    # Usable as @cache_query or @cache_query(cache=..., ttl=...).
+    # The key covers the function (module and name), the query text and every
+    # bound parameter, not just the SQL.
+    # Concurrent misses for one key run the query once and share its result.
+    # With stale_ttl, an expired value is still served for that many seconds
+    # while a single refresh runs in the background on a connection from
+    # `pool` (the default sync or async pool). Row iterators (stream=True)
+    # are one-shot: they are never cached or shared between callers.
+    if func is None:
+        return functools.partial(cache_query, cache=cache, ttl=ttl, stale_ttl=stale_ttl, pool=pool)
+    cache = cache or query_cache
+    flights = query_flights
+
+    if inspect.iscoroutinefunction(func):
+        async def load(conn, key, args, kwargs):
+            try:
+                result = await func(conn, *args, **kwargs)
+            except BaseException as e:
+                flights.finish(key, error=e)
+                raise
+            if not isinstance(result, RowIterator):
+                cache.set(key, result, ttl)
+            flights.finish(key, result)
+            return result
+
+        async def refresh(key, args, kwargs):
+            # Owns the flight the stale hit registered: it is finished on every
+            # exit, or later misses for the key would wait on it forever.
+            try:
+                async with (pool or get_async_pool()).connection() as conn:
+                    result = await func(conn, *args, **kwargs)
+                if not isinstance(result, RowIterator):
+                    cache.set(key, result, ttl)
+            except BaseException as e:
+                flights.finish(key, error=e)
+                if not isinstance(e, Exception):
+                    raise
+                # Otherwise the stale value stays until stale_ttl runs out.
+            else:
+                flights.finish(key, result)
+
+        @functools.wraps(func)
+        async def wrapper(conn, *args, **kwargs):
+            key = (func.__module__, func.__qualname__, _freeze(args), _freeze(kwargs))
+            found, result, stale = cache.lookup(key, stale_ttl)
+            create_future = asyncio.get_running_loop().create_future
+            if found:
+                if stale:
+                    future, leader = flights.join(key, create_future)
+                    if leader:
+                        task = asyncio.create_task(refresh(key, args, kwargs))
+                        _refresh_tasks.add(task)
+                        task.add_done_callback(_refresh_tasks.discard)
+                        # A task cancelled before its first step never runs
+                        # refresh, so its flight is ended here instead.
+                        task.add_done_callback(
+                            lambda _: future.done() or flights.finish(key, error=asyncio.CancelledError()))
+                return result
+            while True:
+                future, leader = flights.join(key, create_future)
+                if leader:
+                    return await load(conn, key, args, kwargs)
+                try:
+                    result = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise
+                    continue  # the leader was cancelled, not us: try again
+                if isinstance(result, RowIterator):
+                    return await func(conn, *args, **kwargs)
+                return result
+    else:
+        def load(conn, key, args, kwargs):
+            try:
+                result = func(conn, *args, **kwargs)
+            except BaseException as e:
+                flights.finish(key, error=e)
+                raise
+            if not isinstance(result, RowIterator):
+                cache.set(key, result, ttl)
+            flights.finish(key, result)
+            return result
+
+        def refresh(key, args, kwargs):
+            # Owns the flight the stale hit registered: it is finished on every
+            # exit, or later misses for the key would wait on it forever.
+            try:
+                with (pool or default_pool).connection() as conn:
+                    result = func(conn, *args, **kwargs)
+                if not isinstance(result, RowIterator):
+                    cache.set(key, result, ttl)
+            except BaseException as e:
+                flights.finish(key, error=e)
+                if not isinstance(e, Exception):
+                    raise
+                # Otherwise the stale value stays until stale_ttl runs out.
+            else:
+                flights.finish(key, result)
 
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            key = (func.__module__, func.__qualname__, _freeze(args), _freeze(kwargs))
+            found, result, stale = cache.lookup(key, stale_ttl)
+            if found:
+                if stale and flights.join(key)[1]:
+                    threading.Thread(target=refresh, args=(key, args, kwargs), daemon=True).start()
+                return result
+            future, leader = flights.join(key)
+            if leader:
+                return load(conn, key, args, kwargs)
+            result = future.result()
+            if isinstance(result, RowIterator):
+                return func(conn, *args, **kwargs)
             return result
-        finally:
-            conn.close()
+    wrapper.cache = cache
+    wrapper.cache_info = cache.info
     return wrapper
 
-@with_db_connection
+@with_pooled_connection
 @cache_query
-def fetch_users_with_cache(conn, query):
+def fetch_users_with_cache(conn, query, params=(), stream=False, arraysize=DEFAULT_ARRAYSIZE):
     cursor = conn.cursor()
-    cursor.execute(query)
+    cursor.execute(query, params)
+    if stream:
+        return RowIterator(cursor, arraysize)
     return cursor.fetchall()
 
 users = fetch_users_with_cache(query="SELECT * FROM users")
@@ -0,0 +1,177 @@
+import sqlite3
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from sqlite_pool import DB_PATH
+
+_STOP = object()
+
+
+def _fail(batch, error):
+    for future, _, _, _ in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+def _abort(conn, outcomes, error):
+    # Nothing in the batch was committed, so calls that had succeeded get
+    # `error`; calls that failed keep their own exception.
+    try:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+    except sqlite3.Error:
+        pass
+    for future, ok, value in outcomes:
+        future.set_exception(error if ok else value)
+
+
+class GroupCommitter:
+    """Coalesces writes from many threads into shared SQLite transactions.
+
+    A single writer thread takes queued calls, up to max_batch at a time and
+    waiting at most max_wait seconds for a batch to fill. It runs each one
+    inside its own SAVEPOINT and then commits the batch once. A failing call
+    rolls back only its savepoint and gets its own exception. If the commit
+    fails, or an error rolls back the whole transaction, every call that had
+    succeeded gets that error; calls not yet run are retried in a new batch.
+    Functions run on the writer's connection and must not commit or roll back
+    themselves.
+    """
+
+    def __init__(self, database=DB_PATH, max_batch=128, max_wait=0.005, **connect_kwargs):
+        self.database = database
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.connect_kwargs = connect_kwargs
+        self.batches = 0
+        self.writes = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._writer, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self._start()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def run(self, func, *args, **kwargs):
+        return self.submit(func, *args, **kwargs).result()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _writer(self):
+        conn = None
+        retry = []
+        while True:
+            if retry:
+                batch = retry
+            else:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                batch = self._collect(first)
+            try:
+                if conn is None:
+                    conn = sqlite3.connect(self.database, isolation_level=None, **self.connect_kwargs)
+                retry = self._flush(conn, batch)
+            except Exception as e:
+                # Never let the writer die with callers still waiting on it.
+                _fail(batch, e)
+                retry = []
+                if conn is not None:
+                    _abort(conn, [], e)
+        if conn is not None:
+            conn.close()
+
+    def _flush(self, conn, batch):
+        # Returns the calls that were not run because the batch transaction
+        # was lost part-way; the writer retries them as the next batch.
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            _fail(batch, e)
+            return []
+        for index, (future, func, args, kwargs) in enumerate(batch):
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                conn.execute("SAVEPOINT write")
+            except sqlite3.Error as e:
+                outcomes.append((future, False, e))
+                _abort(conn, outcomes, e)
+                return batch[index + 1:]
+            try:
+                outcomes.append((future, True, func(conn, *args, **kwargs)))
+            except Exception as e:
+                outcomes.append((future, False, e))
+            if not conn.in_transaction:
+                # Some errors (interrupts, SQLITE_FULL, I/O errors) roll back
+                # the whole transaction, not just the savepoint.
+                _abort(conn, outcomes, sqlite3.OperationalError("group transaction was rolled back"))
+                return batch[index + 1:]
+            try:
+                if not outcomes[-1][1]:
+                    conn.execute("ROLLBACK TO write")
+                conn.execute("RELEASE write")
+            except sqlite3.Error as e:
+                _abort(conn, outcomes, e)
+                return batch[index + 1:]
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            _abort(conn, outcomes, e)
+            return []
+        self.batches += 1
+        self.writes += len(outcomes)
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        return []
+
+    def close(self):
+        with self._lock:
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+
+default_committer = GroupCommitter()
+
+
+def group_commit(func=None, *, committer=None):
+    # Replacement for with_db_connection + transactional on write functions:
+    # the call blocks until the batch it joined is committed, then returns
+    # its own result or raises its own error.
+    if func is None:
+        return functools.partial(group_commit, committer=committer)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return (committer or default_committer).run(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,163 @@
+import functools
+import inspect
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Histogram buckets are a quarter of an octave wide (~19% relative error).
+_BUCKETS_PER_OCTAVE = 4
+
+slow_query_logger = logging.getLogger('slow_queries')
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql):
+    # Normalizes a statement so that calls differing only in literal values
+    # (or in the length of an IN list) are grouped together.
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(?+)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram: constant memory, approximate percentiles."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        bucket = int(math.log2(micros) * _BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        # Upper edge of the bucket holding the p-th percentile, in seconds.
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** ((bucket + 1) / _BUCKETS_PER_OCTAVE) / 1e6, self.max)
+        return self.max
+
+
+class QueryStats:
+    """Per-fingerprint latency histograms plus a slow-query log.
+
+    Only a sample_rate fraction of calls is timed; calls slower than
+    slow_threshold seconds are written to the 'slow_queries' logger (and to
+    slow_log_path if given).
+    """
+
+    def __init__(self, enabled=True, sample_rate=1.0, slow_threshold=0.5, slow_log_path=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self._histograms = {}
+        self._lock = threading.Lock()
+        if slow_log_path:
+            handler = logging.FileHandler(slow_log_path)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            slow_query_logger.addHandler(handler)
+            slow_query_logger.setLevel(logging.WARNING)
+
+    def should_sample(self):
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def record(self, sql, seconds):
+        key = fingerprint(sql) if isinstance(sql, str) else repr(sql)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(seconds)
+        if seconds >= self.slow_threshold:
+            slow_query_logger.warning("slow query (%.1f ms): %s", seconds * 1000, sql)
+
+    def report(self):
+        # One dict per fingerprint, slowest total time first. Latencies in ms.
+        with self._lock:
+            items = list(self._histograms.items())
+        rows = [
+            {
+                'fingerprint': key,
+                'samples': h.count,
+                'total_ms': h.total * 1000,
+                'mean_ms': h.total / h.count * 1000,
+                'p50_ms': h.percentile(50) * 1000,
+                'p95_ms': h.percentile(95) * 1000,
+                'p99_ms': h.percentile(99) * 1000,
+                'max_ms': h.max * 1000,
+            }
+            for key, h in items
+        ]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'sample_rate': self.sample_rate, 'queries': self.report()}, file, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+query_stats = QueryStats(
+    enabled=os.getenv('QUERY_METRICS', '1') != '0',
+    sample_rate=float(os.getenv('QUERY_SAMPLE_RATE', '1.0')),
+    slow_threshold=float(os.getenv('SLOW_QUERY_MS', '500')) / 1000,
+    slow_log_path=os.getenv('SLOW_QUERY_LOG'),
+)
+
+
+def instrument_queries(func=None, *, stats=None):
+    # Times each (sampled) call and files it under the fingerprint of its
+    # `query` argument. When stats are disabled the only cost is one check.
+    if func is None:
+        return functools.partial(instrument_queries, stats=stats)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            current = stats or query_stats
+            if not current.should_sample():
+                return await func(*args, **kwargs)
+            query = kwargs.get('query') or (args[0] if args else None)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current.record(query, time.perf_counter() - start)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        current = stats or query_stats
+        if not current.should_sample():
+            return func(*args, **kwargs)
+        query = kwargs.get('query') or (args[0] if args else None)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            current.record(query, time.perf_counter() - start)
+    return wrapper
@@ -0,0 +1,90 @@
+import random
+import sqlite3
+import threading
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+TRANSIENT_MESSAGES = (
+    'database is locked',
+    'database is busy',
+    'database table is locked',
+    'sqlite_busy',
+    'sqlite_locked',
+)
+
+
+def is_transient(error):
+    # Only lock/busy contention is worth retrying; anything else (syntax
+    # errors, constraint violations, missing tables) fails the same way again.
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None and code & 0xff in (SQLITE_BUSY, SQLITE_LOCKED):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+
+def backoff_delay(attempt, base, cap):
+    # "Full jitter": uniform in [0, min(cap, base * 2**attempt)], so workers
+    # that failed together do not wake up together.
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RetryBudget:
+    """Process-wide token bucket limiting retries to a fraction of successes.
+
+    Each retry spends one token; each successful call earns
+    refill_per_success tokens, up to max_tokens. When the bucket is empty,
+    failures are raised instead of retried, so a struggling database is not
+    hit with a retry storm.
+    """
+
+    def __init__(self, max_tokens=10, refill_per_success=0.1):
+        self.max_tokens = max_tokens
+        self.refill_per_success = refill_per_success
+        self._tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    def try_spend(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.refill_per_success)
+
+
+class RetryMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.retries = 0
+        self.sleep_seconds = 0.0
+        self.budget_exhausted = 0
+        self.gave_up = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'sleep_seconds': self.sleep_seconds,
+                'budget_exhausted': self.budget_exhausted,
+                'gave_up': self.gave_up,
+            }
+
+
+retry_budget = RetryBudget()
+retry_metrics = RetryMetrics()
@@ -0,0 +1,70 @@
+import os
+
+DEFAULT_ARRAYSIZE = int(os.getenv('ROW_ARRAYSIZE', '500'))
+
+_END = object()
+
+
+class RowIterator:
+    """Lazy iterator over a cursor's rows, fetched arraysize rows at a time.
+
+    Only one batch is held in memory. When the rows run out, or close() is
+    called, the cursor is closed and the close callbacks run once. Connection
+    decorators register a callback here so they release the connection then,
+    not when the decorated function returns.
+    """
+
+    def __init__(self, cursor, arraysize=DEFAULT_ARRAYSIZE, on_close=None):
+        cursor.arraysize = arraysize
+        self._cursor = cursor
+        self._batch = iter(())
+        self._callbacks = [on_close] if on_close else []
+        self.closed = False
+
+    def add_close_callback(self, callback):
+        if self.closed:
+            callback()
+        else:
+            self._callbacks.append(callback)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._batch, _END)
+        if row is not _END:
+            return row
+        if self.closed:
+            raise StopIteration
+        try:
+            rows = self._cursor.fetchmany()
+        except BaseException:
+            self.close()
+            raise
+        if not rows:
+            self.close()
+            raise StopIteration
+        self._batch = iter(rows)
+        return next(self._batch)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._batch = iter(())
+        try:
+            self._cursor.close()
+        finally:
+            callbacks, self._callbacks = self._callbacks, []
+            for callback in reversed(callbacks):
+                callback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        # Safety net for iterators dropped half-way: give the connection back.
+        self.close()
@@ -0,0 +1,217 @@
+import asyncio
+import sqlite3
+import functools
+import inspect
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from row_stream import RowIterator
+
+DB_PATH = 'users.db'
+
+
+class SQLitePool:
+    """Checkout/checkin pool of warm sqlite3 connections.
+
+    Connections keep their page cache and prepared-statement cache between
+    calls. At most max_size connections are open at once; idle ones are
+    reused most-recently-used first and closed after idle_timeout seconds.
+    """
+
+    def __init__(self, database=DB_PATH, max_size=8, idle_timeout=300, **connect_kwargs):
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.connect_kwargs = connect_kwargs
+        self._idle = []  # (conn, last_used), most recently used last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def _evict_idle(self):
+        # Called with the lock held.
+        deadline = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < deadline:
+            conn, _ = self._idle.pop(0)
+            conn.close()
+
+    def acquire(self, timeout=None):
+        if not self._slots.acquire(timeout=timeout if timeout is not None else -1):
+            raise TimeoutError(f"No free connection to {self.database} after {timeout}s")
+        try:
+            with self._lock:
+                self._evict_idle()
+                if self._idle:
+                    return self._idle.pop()[0]
+            return sqlite3.connect(self.database, check_same_thread=False, **self.connect_kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+            self._evict_idle()
+        self._slots.release()
+
+    def discard(self, conn):
+        try:
+            conn.close()
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            for conn, _ in self._idle:
+                conn.close()
+            self._idle = []
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+
+class AsyncSQLitePool:
+    """asyncio counterpart of SQLitePool holding aiosqlite connections.
+
+    Waiting for a free slot suspends the coroutine instead of blocking the
+    event loop. A pool serves one event loop; get_async_pool() hands out the
+    one for the running loop and shuts it down with the loop, so idle
+    aiosqlite worker threads do not keep the process alive.
+    aiosqlite is imported on first use only.
+    """
+
+    def __init__(self, database=DB_PATH, max_size=8, idle_timeout=300, **connect_kwargs):
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.connect_kwargs = connect_kwargs
+        self._idle = []  # (conn, last_used), most recently used last
+        self._slots = asyncio.BoundedSemaphore(max_size)
+        self._shutting_down = False
+        self._closer = None  # set by get_async_pool()
+
+    async def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < deadline:
+            conn, _ = self._idle.pop(0)
+            await conn.close()
+
+    async def acquire(self):
+        import aiosqlite
+
+        await self._slots.acquire()
+        try:
+            await self._evict_idle()
+            if self._idle:
+                return self._idle.pop()[0]
+            return await aiosqlite.connect(self.database, **self.connect_kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn):
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except sqlite3.Error:
+            await self.discard(conn)
+            return
+        if self._shutting_down:
+            await self.discard(conn)
+            return
+        self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+
+    async def discard(self, conn):
+        try:
+            await conn.close()
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            await conn.close()
+
+    async def shutdown(self):
+        # Like close(), but connections released afterwards are closed too.
+        self._shutting_down = True
+        await self.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+
+default_pool = SQLitePool()
+_async_pools = weakref.WeakKeyDictionary()
+
+
+async def _shutdown_with_loop(loop, pool):
+    # asyncio.run() cancels every task still pending when main() returns;
+    # this one waits for that, then closes the loop's pooled connections.
+    try:
+        await asyncio.Event().wait()
+    finally:
+        _async_pools.pop(loop, None)
+        await pool.shutdown()
+
+
+def get_async_pool():
+    """
+    Returns the AsyncSQLitePool bound to the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        pool = _async_pools[loop] = AsyncSQLitePool()
+        pool._closer = loop.create_task(_shutdown_with_loop(loop, pool))
+    return pool
+
+
+def with_pooled_connection(func=None, *, pool=None):
+    # Drop-in replacement for with_db_connection: the connection comes from
+    # the pool and goes back to it (rolled back if left mid-transaction).
+    # `async def` functions get an aiosqlite connection from the running
+    # loop's async pool.
+    if func is None:
+        return functools.partial(with_pooled_connection, pool=pool)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            async with (pool or get_async_pool()).connection() as conn:
+                return await func(conn, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        current = pool or default_pool
+        conn = current.acquire()
+        try:
+            result = func(conn, *args, **kwargs)
+        except BaseException:
+            current.release(conn)
+            raise
+        if isinstance(result, RowIterator):
+            # Streamed rows keep the connection until exhausted or closed.
+            result.add_close_callback(functools.partial(current.release, conn))
+        else:
+            current.release(conn)
+        return result
+    return wrapper
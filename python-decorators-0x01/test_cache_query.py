@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Tests for 4-cache_query.py"""
+import asyncio
+import importlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+cache_module = None
+_directory = None
+
+
+def setUpModule():
+    """Imports 4-cache_query, whose demo queries run on import, against a scratch users.db."""
+    global cache_module, _directory
+    _directory = tempfile.TemporaryDirectory()
+    conn = sqlite3.connect(os.path.join(_directory.name, 'users.db'))
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+    conn.commit()
+    conn.close()
+    cwd = os.getcwd()
+    os.chdir(_directory.name)
+    try:
+        cache_module = importlib.import_module('4-cache_query')
+    finally:
+        os.chdir(cwd)
+
+
+def tearDownModule():
+    """Closes the pooled connections to the scratch database."""
+    importlib.import_module('sqlite_pool').default_pool.close()
+    _directory.cleanup()
+
+
+def named(module, value, calls):
+    """A fetch function that claims to live in `module` and returns `value`."""
+    def fetch_users_with_cache(conn, query):
+        calls.append(module)
+        return value
+    fetch_users_with_cache.__module__ = module
+    return fetch_users_with_cache
+
+
+class TestCacheKeys(unittest.TestCase):
+    """What distinguishes two cached calls."""
+
+    def test_same_name_in_different_modules(self):
+        """Functions sharing a name but not a module do not share entries."""
+        cache = cache_module.QueryCache()
+        calls = []
+        first = cache_module.cache_query(named('reports', ['a'], calls), cache=cache)
+        second = cache_module.cache_query(named('exports', ['b'], calls), cache=cache)
+        self.assertEqual(first(None, "SELECT * FROM users"), ['a'])
+        self.assertEqual(second(None, "SELECT * FROM users"), ['b'])
+        self.assertEqual(first(None, "SELECT * FROM users"), ['a'])
+        self.assertEqual(calls, ['reports', 'exports'])
+
+    def test_parameters_are_part_of_the_key(self):
+        """The same SQL with different parameters is cached separately."""
+        cache = cache_module.QueryCache()
+
+        @cache_module.cache_query(cache=cache)
+        def fetch(conn, query, params=()):
+            return list(params)
+
+        self.assertEqual(fetch(None, "SELECT ?", (1,)), [1])
+        self.assertEqual(fetch(None, "SELECT ?", (2,)), [2])
+        self.assertEqual(cache.info()['entries'], 2)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Concurrent misses for one key run the query once."""
+
+    def test_concurrent_misses_share_one_call(self):
+        """Threads missing together all get the single call's result."""
+        cache = cache_module.QueryCache()
+        calls = []
+        release = threading.Event()
+
+        @cache_module.cache_query(cache=cache)
+        def fetch(conn, query):
+            calls.append(query)
+            release.wait(5)
+            return ['row']
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(fetch(None, "SELECT 1"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, ["SELECT 1"])
+        self.assertEqual(results, [['row']] * 8)
+
+    def test_leader_error_reaches_followers_and_is_not_cached(self):
+        """Every waiter sees the failure; the next call tries again."""
+        cache = cache_module.QueryCache()
+        calls = []
+        release = threading.Event()
+
+        @cache_module.cache_query(cache=cache)
+        def fetch(conn, query):
+            calls.append(query)
+            if len(calls) == 1:
+                release.wait(5)
+                raise sqlite3.OperationalError("database is locked")
+            return ['row']
+
+        errors = []
+
+        def call():
+            try:
+                fetch(None, "SELECT 1")
+            except sqlite3.OperationalError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(fetch(None, "SELECT 1"), ['row'])
+        self.assertEqual(len(calls), 2)
+
+    def test_async_misses_share_one_call(self):
+        """Coroutines missing together await the single call."""
+        cache = cache_module.QueryCache()
+        calls = []
+
+        @cache_module.cache_query(cache=cache)
+        async def fetch(conn, query):
+            calls.append(query)
+            await asyncio.sleep(0.02)
+            return ['row']
+
+        async def main():
+            return await asyncio.gather(*(fetch(None, "SELECT 1") for _ in range(8)))
+
+        self.assertEqual(asyncio.run(main()), [['row']] * 8)
+        self.assertEqual(calls, ["SELECT 1"])
+
+    def test_cancelled_async_leader_hands_over(self):
+        """A follower whose leader is cancelled runs the query itself."""
+        cache = cache_module.QueryCache()
+        calls = []
+
+        @cache_module.cache_query(cache=cache)
+        async def fetch(conn, query):
+            calls.append(query)
+            await asyncio.sleep(0.05)
+            return ['row']
+
+        async def main():
+            leader = asyncio.create_task(fetch(None, "SELECT 1"))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(fetch(None, "SELECT 1"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(main()), ['row'])
+        self.assertEqual(len(calls), 2)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    """stale_ttl serves expired values while one refresh runs."""
+
+    def test_stale_value_served_during_single_refresh(self):
+        """An expired entry is returned at once and reloaded once in the background."""
+        cache = cache_module.QueryCache()
+        calls = []
+
+        class Pool:
+            """Stands in for SQLitePool: hands the refresh a dummy connection."""
+            def connection(self):
+                return _NullContext()
+
+        @cache_module.cache_query(cache=cache, ttl=0.05, stale_ttl=5, pool=Pool())
+        def fetch(conn, query):
+            calls.append(query)
+            if len(calls) > 1:
+                time.sleep(0.05)
+            return [len(calls)]
+
+        self.assertEqual(fetch(None, "SELECT 1"), [1])
+        time.sleep(0.1)
+        self.assertEqual([fetch(None, "SELECT 1") for _ in range(5)], [[1]] * 5)
+        deadline = time.monotonic() + 5
+        while fetch(None, "SELECT 1") != [2] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(fetch(None, "SELECT 1"), [2])
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(cache.info()['stale_hits'], 5)
+
+    def test_failed_refresh_does_not_block_later_misses(self):
+        """A refresh that cannot get a connection still ends its flight."""
+        cache = cache_module.QueryCache()
+        calls = []
+
+        class BrokenPool:
+            """A pool that cannot hand out connections."""
+            def connection(self):
+                raise sqlite3.OperationalError("unable to open database file")
+
+        @cache_module.cache_query(cache=cache, ttl=0.05, stale_ttl=0.1, pool=BrokenPool())
+        def fetch(conn, query):
+            calls.append(query)
+            return [len(calls)]
+
+        self.assertEqual(fetch(None, "SELECT 1"), [1])
+        time.sleep(0.07)
+        self.assertEqual(fetch(None, "SELECT 1"), [1])  # stale hit, refresh fails
+        time.sleep(0.15)
+        results = []
+        caller = threading.Thread(target=lambda: results.append(fetch(None, "SELECT 1")), daemon=True)
+        caller.start()
+        caller.join(2)
+        self.assertEqual(results, [[2]])
+
+    def test_cancelled_async_refresh_does_not_block_later_misses(self):
+        """Cancelling the background refresh task, started or not, still ends its flight."""
+        class SlowPool:
+            """An async pool that never hands out a connection."""
+            def connection(self):
+                return _NeverContext()
+
+        for started in (False, True):
+            with self.subTest(started=started):
+                cache = cache_module.QueryCache()
+                calls = []
+
+                @cache_module.cache_query(cache=cache, ttl=0.05, stale_ttl=0.1, pool=SlowPool())
+                async def fetch(conn, query):
+                    calls.append(query)
+                    return [len(calls)]
+
+                async def main():
+                    await fetch(None, "SELECT 1")
+                    await asyncio.sleep(0.07)
+                    await fetch(None, "SELECT 1")  # stale hit starts the refresh task
+                    if started:
+                        await asyncio.sleep(0.01)
+                    for task in list(cache_module._refresh_tasks):
+                        task.cancel()
+                    await asyncio.sleep(0.15)
+                    return await asyncio.wait_for(fetch(None, "SELECT 1"), 2)
+
+                self.assertEqual(asyncio.run(main()), [2])
+
+
+class _NeverContext:
+    """Async context manager whose entry never completes."""
+
+    async def __aenter__(self):
+        await asyncio.Event().wait()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _NullContext:
+    """Context manager yielding None."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Tests for group_commit.py"""
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from group_commit import GroupCommitter, group_commit
+
+
+def set_email(conn, user_id, email):
+    """Updates one user's email and returns its id."""
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (email, user_id))
+    return user_id
+
+
+def fail(conn, user_id, email):
+    """Writes, then raises."""
+    set_email(conn, user_id, email)
+    raise ValueError(f"rejected {user_id}")
+
+
+def interrupted(conn, user_id, email):
+    """
+    Writes with an interrupting progress handler installed. An interrupted
+    statement rolls back the whole transaction, not just its savepoint.
+    """
+    conn.set_progress_handler(lambda: 1, 1)
+    try:
+        set_email(conn, user_id, email)
+    finally:
+        conn.set_progress_handler(None, 1)
+
+
+class TestGroupCommitter(unittest.TestCase):
+    """Batching, per-call outcomes and failure handling of GroupCommitter."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, 'users.db')
+        with sqlite3.connect(self.database) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+            conn.executemany("INSERT INTO users VALUES (?, ?)", [(i, f"u{i}@x.io") for i in range(200)])
+        conn.close()
+
+    def committer(self, **kwargs):
+        committer = GroupCommitter(self.database, **kwargs)
+        self.addCleanup(committer.close)
+        return committer
+
+    def emails(self):
+        conn = sqlite3.connect(self.database)
+        try:
+            return dict(conn.execute("SELECT id, email FROM users"))
+        finally:
+            conn.close()
+
+    def test_concurrent_writes_share_batches(self):
+        """Writes from many threads commit in fewer transactions than calls."""
+        committer = self.committer(max_batch=64, max_wait=0.01)
+        update = group_commit(set_email, committer=committer)
+        threads = [
+            threading.Thread(target=lambda k=k: [update(i, f"new{i}") for i in range(k, 200, 8)])
+            for k in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(committer.writes, 200)
+        self.assertLess(committer.batches, 200)
+        self.assertTrue(all(email == f"new{i}" for i, email in self.emails().items()))
+
+    def test_failing_call_rolls_back_alone(self):
+        """A raising call gets its own error; the rest of its batch commits."""
+        committer = self.committer(max_wait=0.05)
+        futures = [
+            committer.submit(set_email, 1, 'a'),
+            committer.submit(fail, 2, 'b'),
+            committer.submit(set_email, 3, 'c'),
+        ]
+        self.assertEqual(futures[0].result(timeout=5), 1)
+        with self.assertRaises(ValueError):
+            futures[1].result(timeout=5)
+        self.assertEqual(futures[2].result(timeout=5), 3)
+        emails = self.emails()
+        self.assertEqual((emails[1], emails[2], emails[3]), ('a', 'u2@x.io', 'c'))
+
+    def test_lost_transaction_fails_earlier_calls_and_retries_later_ones(self):
+        """Outcomes match what reached the database when the batch is rolled back."""
+        committer = self.committer(max_wait=0.05)
+        futures = [
+            committer.submit(set_email, 1, 'a'),
+            committer.submit(interrupted, 2, 'b'),
+            committer.submit(set_email, 3, 'c'),
+        ]
+        with self.assertRaises(sqlite3.OperationalError):
+            futures[0].result(timeout=5)
+        with self.assertRaisesRegex(sqlite3.OperationalError, 'interrupted'):
+            futures[1].result(timeout=5)
+        self.assertEqual(futures[2].result(timeout=5), 3)
+        emails = self.emails()
+        self.assertEqual((emails[1], emails[2], emails[3]), ('u1@x.io', 'u2@x.io', 'c'))
+
+    def test_unusable_database_fails_callers_instead_of_hanging(self):
+        """Connection errors reach every caller, and the writer keeps serving."""
+        committer = GroupCommitter('/nonexistent/dir/users.db')
+        self.addCleanup(committer.close)
+        for _ in range(2):
+            with self.assertRaises(sqlite3.OperationalError):
+                committer.submit(set_email, 1, 'a').result(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
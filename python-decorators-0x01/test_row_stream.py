@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Tests for row_stream.py"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from row_stream import RowIterator
+from sqlite_pool import SQLitePool, with_pooled_connection
+
+
+class RecordingCursor:
+    """Wraps a sqlite3 cursor and records fetchmany() calls."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.fetches = []
+        self.closed = False
+
+    @property
+    def arraysize(self):
+        return self.cursor.arraysize
+
+    @arraysize.setter
+    def arraysize(self, value):
+        self.cursor.arraysize = value
+
+    def fetchmany(self):
+        rows = self.cursor.fetchmany()
+        self.fetches.append(len(rows))
+        return rows
+
+    def close(self):
+        self.closed = True
+        self.cursor.close()
+
+
+class TestRowIterator(unittest.TestCase):
+    """Batching and close semantics of RowIterator."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.database = os.path.join(directory.name, 'users.db')
+        conn = sqlite3.connect(self.database)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT INTO users VALUES (?)", [(i,) for i in range(25)])
+        conn.commit()
+        self.conn = conn
+        self.addCleanup(conn.close)
+
+    def cursor(self):
+        return RecordingCursor(self.conn.execute("SELECT id FROM users ORDER BY id"))
+
+    def test_fetches_arraysize_rows_at_a_time(self):
+        """All rows come back, read in arraysize batches."""
+        cursor = self.cursor()
+        rows = list(RowIterator(cursor, arraysize=10))
+        self.assertEqual(rows, [(i,) for i in range(25)])
+        self.assertEqual(cursor.fetches, [10, 10, 5, 0])
+
+    def test_exhaustion_closes_once(self):
+        """The cursor closes and callbacks run exactly once when rows run out."""
+        calls = []
+        cursor = self.cursor()
+        rows = RowIterator(cursor, arraysize=10, on_close=lambda: calls.append('closed'))
+        list(rows)
+        rows.close()
+        self.assertTrue(cursor.closed)
+        self.assertTrue(rows.closed)
+        self.assertEqual(calls, ['closed'])
+        self.assertEqual(list(rows), [])
+
+    def test_early_close(self):
+        """Closing part-way stops iteration and releases immediately."""
+        calls = []
+        cursor = self.cursor()
+        with RowIterator(cursor, arraysize=10, on_close=lambda: calls.append('closed')) as rows:
+            self.assertEqual(next(rows), (0,))
+        self.assertTrue(cursor.closed)
+        self.assertEqual(calls, ['closed'])
+        self.assertEqual(list(rows), [])
+
+    def test_callback_added_after_close_runs_at_once(self):
+        """Late callbacks are not lost."""
+        rows = RowIterator(self.cursor())
+        rows.close()
+        calls = []
+        rows.add_close_callback(lambda: calls.append('late'))
+        self.assertEqual(calls, ['late'])
+
+
+class TestPooledStreaming(unittest.TestCase):
+    """with_pooled_connection keeps the connection until the rows are consumed."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        database = os.path.join(directory.name, 'users.db')
+        conn = sqlite3.connect(database)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+        conn.executemany("INSERT INTO users VALUES (?)", [(i,) for i in range(5)])
+        conn.commit()
+        conn.close()
+        self.pool = SQLitePool(database, max_size=1)
+        self.addCleanup(self.pool.close)
+
+    def test_release_deferred_until_exhausted(self):
+        """The only pooled connection stays checked out while rows are pending."""
+        @with_pooled_connection(pool=self.pool)
+        def stream(conn):
+            return RowIterator(conn.execute("SELECT id FROM users"), arraysize=2)
+
+        rows = stream()
+        next(rows)
+        with self.assertRaises(TimeoutError):
+            self.pool.acquire(timeout=0.05)
+        self.assertEqual(len(list(rows)), 4)
+        self.pool.release(self.pool.acquire(timeout=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
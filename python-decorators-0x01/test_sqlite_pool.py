@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Tests for sqlite_pool.py"""
+import asyncio
+import unittest
+from sqlite_pool import get_async_pool
+
+
+class TestGetAsyncPool(unittest.TestCase):
+    """Async pools are per event loop."""
+
+    def test_one_pool_per_loop(self):
+        """Calls within a loop share a pool; a new loop gets a new one."""
+        async def pools():
+            return get_async_pool(), get_async_pool()
+
+        first, same = asyncio.run(pools())
+        second, _ = asyncio.run(pools())
+        self.assertIs(first, same)
+        self.assertIsNot(first, second)
+
+    def test_needs_a_running_loop(self):
+        """Outside a loop there is no pool to hand out."""
+        with self.assertRaises(RuntimeError):
+            get_async_pool()
+
+
+if __name__ == '__main__':
+    unittest.main()
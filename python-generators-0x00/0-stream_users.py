@@ -1,53 +1,41 @@
 import mysql.connector
+from compact_uuid import decode_rows
+from db_pool import connect_to_prodev, release
+from pushdown import build_select
 import os
 
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_USER = os.getenv('DB_USER', 'root')
-DB_PASSWORD = os.getenv('DB_PASSWORD', 'admin')
-DB_NAME = "ALX_prodev_database"
+FETCH_SIZE = int(os.getenv('STREAM_FETCH_SIZE', '1000'))
 
-def connect_to_prodev():
-    """
-    Connects to the ALX_prodev database in MySQL.
-    Returns the connection object if successful, None otherwise.
-    (Duplicated from seed.py for self-containment as per usual exercise setup)
-    """
-    try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return connection
-    except mysql.connector.Error as err:
-        print(f"Error connecting to {DB_NAME} database: {err}")
-        return None
-
-def stream_users():
+def stream_users(buffered=False, fetch_size=FETCH_SIZE, columns=None, where=None):
     """
     Uses a generator to fetch rows one by one from the user_data table.
     Yields each user as a dictionary.
+    By default the cursor is unbuffered: rows are read off the wire fetch_size
+    at a time, so memory stays flat regardless of the table size.
+    buffered=True loads the whole result set up front, which is fine for small tables.
+    columns and where (see pushdown.build_select) are compiled into the SQL,
+    so only the requested columns of matching rows are sent by the server.
     Constraint: No more than 1 loop.
     """
     connection = None
+    cursor = None
     try:
         connection = connect_to_prodev()
         if not connection:
             return
 
-        cursor = connection.cursor(dictionary=True, buffered=True) 
-        query = "SELECT user_id, name, email, age FROM user_data"
-        cursor.execute(query)
-        row = cursor.fetchone()
-        while row:
-            yield row
-            row = cursor.fetchone()
+        cursor = connection.cursor(dictionary=True, buffered=buffered)
+        query, params = build_select(columns, where)
+        cursor.execute(query, params)
+        rows = cursor.fetchmany(fetch_size)
+        while rows:
+            yield from decode_rows(rows)
+            rows = cursor.fetchmany(fetch_size)
 
     except mysql.connector.Error as err:
         print(f"Error streaming users: {err}")
     finally:
-        if 'cursor' in locals() and cursor:
-            cursor.close()
         if connection:
-            connection.close()
\ No newline at end of file
+            # Stopping early leaves unread rows on an unbuffered cursor; the
+            # connection is dropped rather than drained (see db_pool.release).
+            release(connection, cursor)
@@ -1,65 +1,68 @@
 import mysql.connector
-import os
+from array import array
+from compact_uuid import decode_id, decode_rows
+from db_pool import connect_to_prodev, release
+from pushdown import COLUMNS, build_select
 
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_USER = os.getenv('DB_USER', 'root')
-DB_PASSWORD = os.getenv('DB_PASSWORD', 'admin')
-DB_NAME = "ALX_prodev_database"
+OVER_25 = [('age', '>', 25)]
 
 
-def connect_to_prodev():
+def to_columnar(rows, columns=COLUMNS):
     """
-    Connects to the ALX_prodev database in MySQL.
-    Returns the connection object if successful, None otherwise.
+    Transposes a list of row tuples into one column per field of `columns`.
+    Ages become an array('d') of floats, which supports the buffer protocol
+    (numpy.frombuffer(batch['age']) wraps it without copying); user_ids are
+    returned as strings.
     """
-    try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return connection
-    except mysql.connector.Error as err:
-        print(f"Error connecting to {DB_NAME} database: {err}")
-        return None
+    values = zip(*rows) if rows else ([] for _ in columns)
+    batch = {
+        column: array('d', column_values) if column == 'age' else list(column_values)
+        for column, column_values in zip(columns, values)
+    }
+    if 'user_id' in batch:
+        batch['user_id'] = list(map(decode_id, batch['user_id']))
+    return batch
 
-def stream_users_in_batches(batch_size):
+def stream_users_in_batches(batch_size, columnar=False, columns=None, where=None):
     """
     Fetches rows from the user_data table in batches using a generator.
     Yields a list of users for each batch.
+    With columnar=True each batch is instead a dict of columns (see to_columnar),
+    with ages cast to DOUBLE by MySQL, avoiding one dict per row.
+    columns and where (see pushdown.build_select) are compiled into the SQL,
+    so only the requested columns of matching rows are sent by the server.
     """
     connection = None
+    cursor = None
     try:
         connection = connect_to_prodev()
         if not connection:
             return
 
-        cursor = connection.cursor(dictionary=True)
-        query = "SELECT user_id, name, email, age FROM user_data"
-        cursor.execute(query)
+        cursor = connection.cursor(dictionary=not columnar)
+        query, params = build_select(columns, where, cast_age=columnar)
+        cursor.execute(query, params)
 
         while True:
             batch = cursor.fetchmany(batch_size)
             if not batch:
                 break
-            yield batch
+            yield to_columnar(batch, columns or COLUMNS) if columnar else decode_rows(batch)
 
     except mysql.connector.Error as err:
         print(f"Error streaming users in batches: {err}")
     finally:
-        if 'cursor' in locals() and cursor:
-            cursor.close()
         if connection:
-            connection.close()
+            release(connection, cursor)
 
 def batch_processing(batch_size):
     """
     Processes each batch to filter users over the age of 25.
     Prints the filtered users.
+    The age filter is pushed down to MySQL (backed by the age index), so
+    younger users never leave the server.
     Constraint: No more than 3 loops in total (across both functions).
     """
-    for batch in stream_users_in_batches(batch_size):
+    for batch in stream_users_in_batches(batch_size, where=OVER_25):
         for user in batch:
-            if user['age'] > 25:
-                print(user)
\ No newline at end of file
+            print(user)
@@ -1,29 +1,10 @@
 import mysql.connector
-import os
+import base64
+import json
+from compact_uuid import decode_rows, encode_id
+from db_pool import connect_to_prodev
+from prefetch import read_ahead
 
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_USER = os.getenv('DB_USER', 'root')
-DB_PASSWORD = os.getenv('DB_PASSWORD', 'admin')
-DB_NAME = "ALX_prodev_database"
-
-
-def connect_to_prodev():
-    """
-    Connects to the ALX_prodev database in MySQL.
-    Returns the connection object if successful, None otherwise.
-    (Duplicated from seed.py for self-containment)
-    """
-    try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return connection
-    except mysql.connector.Error as err:
-        print(f"Error connecting to {DB_NAME} database: {err}")
-        return None
 
 def paginate_users(page_size, offset):
     """
@@ -38,7 +19,7 @@ def paginate_users(page_size, offset):
     try:
         cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
         rows = cursor.fetchall()
-        return rows
+        return decode_rows(rows)
     except mysql.connector.Error as err:
         print(f"Error fetching page: {err}")
         return []
@@ -48,17 +29,89 @@ def paginate_users(page_size, offset):
         if connection:
             connection.close()
 
-def lazy_pagination(page_size):
+def lazy_pagination(page_size, prefetch=0):
     """
     Implements a generator function that fetches data page by page from user_data table
     using paginate_users, only fetching the next page when needed.
+    With prefetch > 0, up to that many pages are fetched ahead in a background thread.
     Starts at offset 0.
     Constraint: Only one loop.
     """
+    if prefetch:
+        yield from read_ahead(lazy_pagination(page_size), prefetch)
+        return
     offset = 0
     while True:
         page = paginate_users(page_size, offset)
         if not page:
             break
         yield page
-        offset += page_size
\ No newline at end of file
+        offset += page_size
+
+def paginate_users_after(connection, page_size, last_user_id=None):
+    """
+    Fetches the page of users that follows last_user_id in user_id order.
+    Seeks through the primary key index instead of skipping OFFSET rows,
+    so every page costs the same no matter how deep into the table it is.
+    """
+    cursor = connection.cursor(dictionary=True)
+    try:
+        if last_user_id is None:
+            cursor.execute(
+                "SELECT * FROM user_data ORDER BY user_id LIMIT %s",
+                (page_size,)
+            )
+        else:
+            cursor.execute(
+                "SELECT * FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                (encode_id(last_user_id), page_size)
+            )
+        return decode_rows(cursor.fetchall())
+    finally:
+        cursor.close()
+
+def encode_resume_token(last_user_id):
+    """
+    Builds the opaque token handed out after each keyset page.
+    """
+    payload = json.dumps({"after": last_user_id}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+def decode_resume_token(token):
+    """
+    Returns the user_id a resume token points after, or None for a fresh scan.
+    Raises ValueError if the token is malformed.
+    """
+    if not token:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode('ascii')))["after"]
+    except (ValueError, KeyError, TypeError) as err:
+        raise ValueError(f"Invalid resume token: {token!r}") from err
+
+def lazy_keyset_pagination(page_size, resume_token=None, prefetch=0):
+    """
+    Generator that walks user_data page by page with keyset pagination over
+    a single connection. Yields (page, resume_token) tuples; passing the last
+    token seen back in resumes the scan right after that page.
+    With prefetch > 0, up to that many pages are fetched ahead in a background thread.
+    Constraint: Only one loop.
+    """
+    if prefetch:
+        yield from read_ahead(lazy_keyset_pagination(page_size, resume_token), prefetch)
+        return
+    last_user_id = decode_resume_token(resume_token)
+    connection = connect_to_prodev()
+    if not connection:
+        return
+    try:
+        while True:
+            page = paginate_users_after(connection, page_size, last_user_id)
+            if not page:
+                break
+            last_user_id = page[-1]['user_id']
+            yield page, encode_resume_token(last_user_id)
+    except mysql.connector.Error as err:
+        print(f"Error fetching page: {err}")
+    finally:
+        connection.close()
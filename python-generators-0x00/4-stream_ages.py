@@ -1,34 +1,17 @@
 import mysql.connector
+from operator import itemgetter
+from db_pool import connect_to_prodev, release
 import os
 
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_USER = os.getenv('DB_USER', 'root')
-DB_PASSWORD = os.getenv('DB_PASSWORD', 'admin')
-DB_NAME = "ALX_prodev_database"
+AGE_BATCH_SIZE = int(os.getenv('AGE_BATCH_SIZE', '5000'))
 
 
-def connect_to_prodev():
-    """
-    Connects to the ALX_prodev database in MySQL.
-    Returns the connection object if successful, None otherwise.
-    """
-    try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return connection
-    except mysql.connector.Error as err:
-        print(f"Error connecting to {DB_NAME} database: {err}")
-        return None
-
 def stream_user_ages():
     """
     Generator function that yields user ages one by one from the user_data table.
     """
     connection = None
+    cursor = None
     try:
         connection = connect_to_prodev()
         if not connection:
@@ -46,10 +29,34 @@ def stream_user_ages():
     except mysql.connector.Error as err:
         print(f"Error streaming ages: {err}")
     finally:
-        if 'cursor' in locals() and cursor:
-            cursor.close()
         if connection:
-            connection.close()
+            release(connection, cursor)
+
+def stream_user_ages_in_batches(batch_size=AGE_BATCH_SIZE):
+    """
+    Generator function that yields user ages as lists of floats, one fetchmany chunk at a time.
+    The DECIMAL to DOUBLE conversion is done by MySQL so no Decimal objects are built client side.
+    """
+    connection = None
+    cursor = None
+    try:
+        connection = connect_to_prodev()
+        if not connection:
+            return
+
+        cursor = connection.cursor()
+        cursor.execute("SELECT CAST(age AS DOUBLE) FROM user_data")
+
+        rows = cursor.fetchmany(batch_size)
+        while rows:
+            yield list(map(itemgetter(0), rows))
+            rows = cursor.fetchmany(batch_size)
+
+    except mysql.connector.Error as err:
+        print(f"Error streaming ages: {err}")
+    finally:
+        if connection:
+            release(connection, cursor)
 
 def calculate_average_age():
     """
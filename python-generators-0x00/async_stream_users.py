@@ -0,0 +1,133 @@
+import aiomysql
+import asyncio
+import weakref
+from contextlib import aclosing, suppress
+from compact_uuid import decode_rows, encode_id
+from db_pool import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME, POOL_SIZE
+
+# One aiomysql pool per event loop; a pool cannot be shared across loops.
+_pools = weakref.WeakKeyDictionary()
+
+
+async def get_async_pool():
+    """
+    Returns the aiomysql pool bound to the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = await aiomysql.create_pool(
+            host=DB_HOST,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            db=DB_NAME,
+            maxsize=POOL_SIZE,
+            autocommit=True
+        )
+        _pools[loop] = pool
+    return pool
+
+
+async def _prefetched(fetch):
+    """
+    Async generator over the non-empty results of repeated `await fetch(previous)`
+    calls, where previous is the last result (None on the first call).
+    The next fetch is started before the current result is handed out, so the
+    database round-trip overlaps with whatever the consumer does in between.
+    """
+    pending = asyncio.ensure_future(fetch(None))
+    try:
+        while True:
+            rows = await pending
+            if not rows:
+                return
+            pending = asyncio.ensure_future(fetch(rows))
+            yield rows
+    finally:
+        if not pending.done():
+            pending.cancel()
+            with suppress(asyncio.CancelledError):
+                await pending
+
+
+async def _stream_batches(batch_size):
+    """
+    Streams user_data through a server-side cursor in batches of batch_size.
+    """
+    pool = await get_async_pool()
+    connection = await pool.acquire()
+    finished = False
+    try:
+        # Not `async with`: closing an SSCursor reads every remaining row off
+        # the wire, so an abandoned stream must close the connection instead.
+        cursor = await connection.cursor(aiomysql.SSDictCursor)
+        await cursor.execute("SELECT user_id, name, email, age FROM user_data")
+        async with aclosing(_prefetched(lambda previous: cursor.fetchmany(batch_size))) as batches:
+            async for batch in batches:
+                yield decode_rows(batch)
+        await cursor.close()
+        finished = True
+    except aiomysql.Error as err:
+        print(f"Error streaming users: {err}")
+    finally:
+        if not finished:
+            # Unread rows are still on the wire: drop the connection instead of reusing it.
+            connection.close()
+        pool.release(connection)
+
+
+async def stream_users_async(fetch_size=1000):
+    """
+    Async generator counterpart of stream_users(): yields each user as a dictionary.
+    Rows are read fetch_size at a time from a server-side cursor, with the next
+    batch prefetched while the current one is consumed.
+    """
+    async with aclosing(_stream_batches(fetch_size)) as batches:
+        async for batch in batches:
+            for row in batch:
+                yield row
+
+
+async def stream_users_in_batches_async(batch_size):
+    """
+    Async generator counterpart of stream_users_in_batches(): yields lists of users.
+    """
+    async with aclosing(_stream_batches(batch_size)) as batches:
+        async for batch in batches:
+            yield batch
+
+
+async def lazy_pagination_async(page_size):
+    """
+    Async generator counterpart of lazy_pagination(): yields pages of users.
+    Pages are read with keyset pagination on user_id over one connection,
+    and the next page is queried while the caller processes the current one.
+    """
+    pool = await get_async_pool()
+
+    async def next_page(previous):
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            if previous is None:
+                await cursor.execute(
+                    "SELECT * FROM user_data ORDER BY user_id LIMIT %s", (page_size,)
+                )
+            else:
+                await cursor.execute(
+                    "SELECT * FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                    (encode_id(previous[-1]['user_id']), page_size)
+                )
+            return decode_rows(await cursor.fetchall())
+
+    connection = await pool.acquire()
+    finished = False
+    try:
+        async with aclosing(_prefetched(next_page)) as pages:
+            async for page in pages:
+                yield page
+        finished = True
+    except aiomysql.Error as err:
+        print(f"Error fetching page: {err}")
+    finally:
+        if not finished:
+            connection.close()
+        pool.release(connection)
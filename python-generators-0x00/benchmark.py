@@ -0,0 +1,250 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sqlite3
+import time
+import seed_synthetic
+
+DEFAULT_SIZES = (1000, 100000, 1000000, 10000000)
+PATTERNS = ('stream_users', 'stream_users_in_batches', 'lazy_pagination',
+            'lazy_keyset_pagination', 'calculate_average_age')
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', 'ALX_prodev_bench')
+BATCH_SIZE = 1000
+# OFFSET pagination rescans every skipped row on each page, so it is
+# quadratic in the table size; above this it would not finish in useful time.
+OFFSET_MAX_ROWS = 1000000
+
+
+# SQLite stand-in ---------------------------------------------------------
+# The same access patterns as the MySQL modules, written against sqlite3 so
+# the harness runs without a database server.
+
+def seed_sqlite(path, size):
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE user_data (user_id TEXT PRIMARY KEY, name TEXT NOT NULL, "
+        "email TEXT NOT NULL, age NUMERIC NOT NULL)"
+    )
+    connection.execute("CREATE INDEX user_data_email ON user_data (email)")
+    for chunk in seed_synthetic.generate_users(size):
+        connection.executemany("INSERT INTO user_data VALUES (?, ?, ?, ?)", chunk)
+    connection.commit()
+    connection.close()
+
+
+def _sqlite_stream(path, query, batch_size, per_row):
+    connection = sqlite3.connect(path)
+    try:
+        cursor = connection.execute(query)
+        rows = cursor.fetchmany(batch_size)
+        while rows:
+            if per_row:
+                yield from rows
+            else:
+                yield rows
+            rows = cursor.fetchmany(batch_size)
+    finally:
+        connection.close()
+
+
+def _sqlite_offset_pages(path, page_size):
+    offset = 0
+    while True:
+        connection = sqlite3.connect(path)
+        page = connection.execute(
+            "SELECT * FROM user_data LIMIT ? OFFSET ?", (page_size, offset)
+        ).fetchall()
+        connection.close()
+        if not page:
+            return
+        yield page
+        offset += page_size
+
+
+def _sqlite_keyset_pages(path, page_size):
+    connection = sqlite3.connect(path)
+    try:
+        page = connection.execute(
+            "SELECT * FROM user_data ORDER BY user_id LIMIT ?", (page_size,)
+        ).fetchall()
+        while page:
+            yield page
+            page = connection.execute(
+                "SELECT * FROM user_data WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                (page[-1][0], page_size)
+            ).fetchall()
+    finally:
+        connection.close()
+
+
+def _sqlite_average_age(path):
+    total, count = 0.0, 0
+    for age, in _sqlite_stream(path, "SELECT age FROM user_data", BATCH_SIZE, True):
+        total += float(age)
+        count += 1
+    yield total / count if count else 0
+
+
+def sqlite_pattern(name, path):
+    if name == 'stream_users':
+        return _sqlite_stream(path, "SELECT user_id, name, email, age FROM user_data", BATCH_SIZE, True)
+    if name == 'stream_users_in_batches':
+        return _sqlite_stream(path, "SELECT user_id, name, email, age FROM user_data", BATCH_SIZE, False)
+    if name == 'lazy_pagination':
+        return _sqlite_offset_pages(path, BATCH_SIZE)
+    if name == 'lazy_keyset_pagination':
+        return _sqlite_keyset_pages(path, BATCH_SIZE)
+    return _sqlite_average_age(path)
+
+
+# MySQL -------------------------------------------------------------------
+# Runs the real modules against a scratch database (BENCH_DB_NAME).
+
+def seed_mysql(size):
+    import seed
+    connection = seed.connect_db()
+    seed.create_database(connection)
+    connection.close()
+    connection = seed.connect_to_prodev()
+    seed.create_table(connection)
+    cursor = connection.cursor()
+    cursor.execute("TRUNCATE TABLE user_data")
+    cursor.close()
+    connection.close()
+    seed_synthetic.insert_synthetic(size)
+
+
+def mysql_pattern(name):
+    if name == 'stream_users':
+        return __import__('0-stream_users').stream_users()
+    if name == 'stream_users_in_batches':
+        return __import__('1-batch_processing').stream_users_in_batches(BATCH_SIZE)
+    if name == 'lazy_pagination':
+        return __import__('2-lazy_paginate').lazy_pagination(BATCH_SIZE)
+    if name == 'lazy_keyset_pagination':
+        return (page for page, _ in __import__('2-lazy_paginate').lazy_keyset_pagination(BATCH_SIZE))
+    return iter([__import__('4-stream_ages').calculate_average_age()])
+
+
+# Harness -----------------------------------------------------------------
+
+def _reset_peak_rss():
+    """
+    Resets the kernel's peak-RSS mark (VmHWM) to the current RSS. ru_maxrss
+    cannot be used for this: Linux carries it over from the parent across
+    fork and exec. Returns False where /proc/self/clear_refs is unavailable.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb(reset):
+    """
+    Peak RSS since _reset_peak_rss(), or ru_maxrss if the reset was not possible.
+    """
+    if reset:
+        with open('/proc/self/status', 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(backend, name, sqlite_path, table_rows):
+    """
+    Runs one access pattern to completion in the current (fresh) process and
+    returns rows, elapsed seconds, time to first item and peak RSS.
+    Aggregates yield a single value, so their throughput is counted in table rows.
+    """
+    reset = _reset_peak_rss()
+    start = time.perf_counter()
+    stream = sqlite_pattern(name, sqlite_path) if backend == 'sqlite' else mysql_pattern(name)
+    first_item = None
+    rows = 0
+    for item in stream:
+        if first_item is None:
+            first_item = time.perf_counter() - start
+        rows += len(item) if isinstance(item, list) else 1
+    elapsed = time.perf_counter() - start
+    if name == 'calculate_average_age':
+        rows = table_rows
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed else None,
+        'time_to_first_row': first_item,
+        'peak_rss_kb': _peak_rss_kb(reset),
+    }
+
+
+def run_pattern(backend, name, sqlite_path, table_rows):
+    """
+    Measures a pattern in a freshly spawned process so peak RSS belongs to that pattern alone.
+    """
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_measure, (backend, name, sqlite_path, table_rows))
+
+
+def run(backend, sizes, patterns, sqlite_path, output, offset_max_rows=OFFSET_MAX_ROWS):
+    """
+    Seeds a table of each size, measures every pattern against it and writes
+    the results as JSON to `output`. Returns the list of result records.
+    lazy_pagination is skipped on tables larger than offset_max_rows.
+    """
+    results = []
+    for size in sizes:
+        print(f"Seeding {size} rows ({backend})...")
+        if backend == 'sqlite':
+            seed_sqlite(sqlite_path, size)
+        else:
+            seed_mysql(size)
+        for name in patterns:
+            if name == 'lazy_pagination' and size > offset_max_rows:
+                print(f"  {name}: skipped above {offset_max_rows} rows (see --offset-max-rows)")
+                continue
+            measurement = run_pattern(backend, name, sqlite_path, size)
+            record = {'backend': backend, 'table_rows': size, 'pattern': name, **measurement}
+            results.append(record)
+            print(f"  {name}: {measurement['rows_per_sec'] or 0:.0f} rows/s, "
+                  f"first row {measurement['time_to_first_row'] or 0:.4f}s, "
+                  f"peak RSS {measurement['peak_rss_kb']} KB")
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({'python': platform.python_version(), 'results': results}, file, indent=2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the python-generators-0x00 access patterns.")
+    parser.add_argument('--backend', choices=('sqlite', 'mysql'), default='sqlite')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated table sizes")
+    parser.add_argument('--patterns', default=','.join(PATTERNS),
+                        help="comma-separated subset of: " + ', '.join(PATTERNS))
+    parser.add_argument('--offset-max-rows', type=int, default=OFFSET_MAX_ROWS,
+                        help="largest table lazy_pagination (OFFSET) is run on")
+    parser.add_argument('--sqlite-path', default='bench_user_data.sqlite3')
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    if args.backend == 'mysql':
+        # Must be set before db_pool is imported by the modules under test.
+        os.environ['DB_NAME'] = BENCH_DB_NAME
+    sizes = [int(size) for size in args.sizes.split(',')]
+    patterns = [name for name in args.patterns.split(',') if name]
+    unknown = set(patterns) - set(PATTERNS)
+    if unknown:
+        parser.error(f"unknown patterns: {', '.join(sorted(unknown))}")
+    run(args.backend, sizes, patterns, args.sqlite_path, args.output, args.offset_max_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import mysql.connector
+import os
+import sys
+import uuid
+from db_pool import DB_NAME, connect_to_prodev
+
+# Set USER_ID_BINARY=1 when user_data stores user_id as BINARY(16).
+USER_ID_BINARY = os.getenv('USER_ID_BINARY', '0') == '1'
+MIGRATION_CHUNK_SIZE = int(os.getenv('MIGRATION_CHUNK_SIZE', '10000'))
+
+
+def encode_id(user_id):
+    """
+    Converts a user_id (or a hex prefix of one, as used for range bounds) into
+    the form stored in the table: 16 raw bytes in compact mode, unchanged otherwise.
+    """
+    if not USER_ID_BINARY or isinstance(user_id, (bytes, bytearray)):
+        return user_id
+    return bytes.fromhex(user_id.replace('-', ''))
+
+
+def decode_id(value):
+    """
+    Converts a stored user_id back to its canonical string form.
+    """
+    if isinstance(value, (bytes, bytearray)) and len(value) == 16:
+        return str(uuid.UUID(bytes=bytes(value)))
+    return value
+
+
+def decode_rows(rows):
+    """
+    Returns rows with user_id converted back to strings. Works on lists of
+    dictionary rows; rows without a user_id key, or any rows when compact mode
+    is off, are returned as they are.
+    """
+    if not USER_ID_BINARY or not rows or 'user_id' not in rows[0]:
+        return rows
+    for row in rows:
+        row['user_id'] = decode_id(row['user_id'])
+    return rows
+
+
+def _user_id_type(cursor):
+    cursor.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'user_data' AND COLUMN_NAME = %s",
+        (DB_NAME, 'user_id')
+    )
+    row = cursor.fetchone()
+    return row[0].lower() if row else None
+
+
+def _has_column(cursor, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'user_data' AND COLUMN_NAME = %s",
+        (DB_NAME, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _fill_binary_ids(connection, cursor, chunk_size):
+    """
+    Fills user_id_bin from user_id one primary-key range at a time,
+    committing after each chunk so locks stay short. Safe to re-run.
+    """
+    last_user_id = ''
+    converted = 0
+    while True:
+        cursor.execute(
+            "SELECT MAX(user_id) FROM (SELECT user_id FROM user_data WHERE user_id > %s "
+            "ORDER BY user_id LIMIT %s) AS chunk",
+            (last_user_id, chunk_size)
+        )
+        upper = cursor.fetchone()[0]
+        if upper is None:
+            return converted
+        cursor.execute(
+            "UPDATE user_data SET user_id_bin = UNHEX(REPLACE(user_id, '-', '')) "
+            "WHERE user_id > %s AND user_id <= %s AND user_id_bin IS NULL",
+            (last_user_id, upper)
+        )
+        connection.commit()
+        converted += cursor.rowcount
+        last_user_id = upper
+        print(f"Converted {converted} user_ids (up to {upper})...")
+
+
+def migrate_to_binary(connection, chunk_size=MIGRATION_CHUNK_SIZE):
+    """
+    Converts an existing user_data table from VARCHAR(36) to BINARY(16) user_ids in place.
+    A user_id_bin column is added and filled in primary-key chunks (resumable
+    if interrupted). The swap runs under LOCK TABLES: rows written meanwhile are
+    converted, then user_id_bin becomes the primary key. Writes to user_data
+    block for the swap, which rebuilds the table.
+    Returns True on success.
+    """
+    cursor = connection.cursor()
+    try:
+        if _user_id_type(cursor) == 'binary':
+            print("user_data.user_id is already BINARY(16).")
+            return True
+        if not _has_column(cursor, 'user_id_bin'):
+            cursor.execute("ALTER TABLE user_data ADD COLUMN user_id_bin BINARY(16) NULL")
+        _fill_binary_ids(connection, cursor, chunk_size)
+        # Rows written during the chunked fill usually land behind its cursor
+        # (keys are random UUIDs). Block writes, convert them, then swap.
+        cursor.execute("LOCK TABLES user_data WRITE")
+        try:
+            cursor.execute(
+                "UPDATE user_data SET user_id_bin = UNHEX(REPLACE(user_id, '-', '')) "
+                "WHERE user_id_bin IS NULL"
+            )
+            print(f"Converted {cursor.rowcount} user_ids written during the migration.")
+            cursor.execute(
+                "ALTER TABLE user_data "
+                "DROP PRIMARY KEY, "
+                "DROP COLUMN user_id, "
+                "CHANGE COLUMN user_id_bin user_id BINARY(16) NOT NULL FIRST, "
+                "ADD PRIMARY KEY (user_id)"
+            )
+            connection.commit()
+        finally:
+            cursor.execute("UNLOCK TABLES")
+        print("user_data.user_id migrated to BINARY(16). Set USER_ID_BINARY=1 for the streaming modules.")
+        return True
+    except mysql.connector.Error as err:
+        print(f"Failed migrating user_id to BINARY(16): {err}")
+        connection.rollback()
+        return False
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    chunk_size = int(sys.argv[1]) if len(sys.argv) > 1 else MIGRATION_CHUNK_SIZE
+    connection = connect_to_prodev()
+    if connection:
+        try:
+            migrate_to_binary(connection, chunk_size)
+        finally:
+            connection.close()
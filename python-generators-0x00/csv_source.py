@@ -0,0 +1,80 @@
+import csv
+import mmap
+import os
+import uuid
+from decimal import Decimal
+from itertools import islice
+
+DEFAULT_CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'user_data.csv')
+CHUNK_BYTES = int(os.getenv('CSV_CHUNK_BYTES', str(1 << 20)))
+
+# Namespace for user_ids derived from row contents when the CSV has none.
+USER_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, 'alx-prodev.user_data')
+
+
+def derive_user_id(name, email, age):
+    """
+    Returns a stable UUID for a row without a user_id, so repeated passes
+    over the same file (or a reload of it) agree on every row's id.
+    """
+    return str(uuid.uuid5(USER_ID_NAMESPACE, f"{name}\x1f{email}\x1f{age}"))
+
+
+def iter_csv_chunks(csv_path=DEFAULT_CSV_PATH, chunk_bytes=CHUNK_BYTES):
+    """
+    Memory-maps csv_path and yields (header, rows) for every chunk of about
+    chunk_bytes, where rows is a list of parsed records. Chunks always end on
+    a line break, so a record may not span lines (as in the exports seed.py reads).
+    """
+    with open(csv_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            header_end = mapped.find(b'\n')
+            if header_end == -1:
+                return
+            header = next(csv.reader([mapped[:header_end].decode('utf-8').rstrip('\r')]))
+            position = header_end + 1
+            size = len(mapped)
+            while position < size:
+                end = mapped.find(b'\n', min(position + chunk_bytes, size - 1))
+                end = size if end == -1 else end + 1
+                lines = mapped[position:end].decode('utf-8').splitlines()
+                yield header, list(csv.reader(lines))
+                position = end
+
+
+def stream_users(csv_path=DEFAULT_CSV_PATH):
+    """
+    File-backed counterpart of stream_users(): yields each user as a dictionary
+    with the same keys and types as the user_data table (age as Decimal).
+    """
+    for header, rows in iter_csv_chunks(csv_path):
+        name_at, email_at, age_at = header.index('name'), header.index('email'), header.index('age')
+        user_id_at = header.index('user_id') if 'user_id' in header else None
+        for row in rows:
+            if not row:
+                continue
+            name, email, age = row[name_at], row[email_at], row[age_at]
+            user_id = row[user_id_at] if user_id_at is not None and row[user_id_at] else derive_user_id(name, email, age)
+            yield {'user_id': user_id, 'name': name, 'email': email, 'age': Decimal(age)}
+
+
+def stream_users_in_batches(batch_size, csv_path=DEFAULT_CSV_PATH):
+    """
+    File-backed counterpart of stream_users_in_batches(): yields lists of users.
+    """
+    users = stream_users(csv_path)
+    batch = list(islice(users, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(users, batch_size))
+
+
+def stream_user_ages(csv_path=DEFAULT_CSV_PATH):
+    """
+    File-backed counterpart of stream_user_ages(): yields ages as floats.
+    """
+    for header, rows in iter_csv_chunks(csv_path):
+        age_at = header.index('age')
+        yield from (float(row[age_at]) for row in rows if row)
@@ -0,0 +1,136 @@
+import mysql.connector
+from mysql.connector import pooling
+import os
+import threading
+import time
+
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+DB_USER = os.getenv('DB_USER', 'root')
+DB_PASSWORD = os.getenv('DB_PASSWORD', 'admin')
+DB_NAME = os.getenv('DB_NAME', "ALX_prodev_database")
+POOL_NAME = "prodev_pool"
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+POOL_WAIT_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+
+DB_CONFIG = {
+    'host': DB_HOST,
+    'user': DB_USER,
+    'password': DB_PASSWORD,
+    'database': DB_NAME,
+}
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# Pools inherited through fork() are kept referenced so their sockets,
+# which still belong to the parent, are never closed from the child.
+_inherited_pools = []
+# Creation time of each pooled connection, keyed by the raw connection id.
+_born = {}
+
+
+def get_pool():
+    """
+    Returns the process-wide MySQLConnectionPool, creating it on first use.
+    A forked child gets a fresh pool instead of sharing the parent's sockets.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            if _pool is not None:
+                _inherited_pools.append(_pool)
+                _born.clear()
+            _pool = pooling.MySQLConnectionPool(
+                pool_name=POOL_NAME,
+                pool_size=POOL_SIZE,
+                pool_reset_session=True,
+                **DB_CONFIG
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _checkout(timeout):
+    """
+    Takes a connection from the pool, polling while it is exhausted.
+    Returns None if none was freed within `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    while True:
+        try:
+            return get_pool().get_connection()
+        except mysql.connector.PoolError:
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+
+def connect_to_prodev():
+    """
+    Checks a connection to the ALX_prodev database out of the shared pool.
+    The connection is pinged on checkout and transparently reopened when it is
+    dead or older than DB_POOL_MAX_LIFETIME seconds. Calling close() on it
+    returns it to the pool instead of tearing down the TCP session.
+    When every pooled connection is checked out, waits up to DB_POOL_TIMEOUT
+    seconds for one to come back, then opens a direct (unpooled) connection.
+    Returns the connection object if successful, None otherwise.
+    """
+    try:
+        connection = _checkout(POOL_WAIT_TIMEOUT)
+        if connection is None:
+            print(f"Connection pool exhausted after {POOL_WAIT_TIMEOUT}s; opening a direct connection.")
+            return mysql.connector.connect(**DB_CONFIG)
+    except mysql.connector.Error as err:
+        print(f"Error connecting to {DB_NAME} database: {err}")
+        return None
+
+    raw_id = id(connection._cnx)
+    now = time.monotonic()
+    try:
+        if now - _born.setdefault(raw_id, now) > POOL_MAX_LIFETIME:
+            connection.reconnect(attempts=1)
+            _born[raw_id] = time.monotonic()
+        else:
+            connection.ping(reconnect=True, attempts=1)
+    except mysql.connector.Error as err:
+        print(f"Error connecting to {DB_NAME} database: {err}")
+        _born.pop(raw_id, None)
+        connection.close()
+        return None
+    return connection
+
+
+def discard(connection):
+    """
+    Closes a connection without reading the rows still pending on it.
+    The socket is dropped; a pooled connection's slot goes back to the pool,
+    which reconnects it on its next checkout.
+    """
+    raw = getattr(connection, '_cnx', None) or connection
+    _born.pop(id(raw), None)
+    raw.disconnect()
+    if raw is not connection:
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            pass  # resetting the session fails on the dropped socket, after the slot is returned
+
+
+def release(connection, cursor=None):
+    """
+    Closes cursor and hands connection back once a query is done with them.
+    An abandoned unbuffered read leaves unread rows on the connection: closing
+    the cursor would raise "Unread result found" and reusing the connection
+    would mean reading them all, so it is discarded instead.
+    """
+    if connection.unread_result:
+        discard(connection)
+        return
+    try:
+        if cursor is not None:
+            cursor.close()
+    finally:
+        connection.close()
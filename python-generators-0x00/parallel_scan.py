@@ -0,0 +1,141 @@
+import mysql.connector
+import multiprocessing
+import os
+import queue
+from compact_uuid import decode_rows
+from db_pool import connect_to_prodev, release
+from pushdown import build_select
+
+KEY_SPACE = 0x10000
+QUEUE_DEPTH = 4
+
+
+def partition_bounds(partitions):
+    """
+    Splits the user_id key space into `partitions` contiguous ranges.
+    user_id holds random (v4) UUIDs, so equal slices of the leading hex
+    digits give ranges of roughly equal size (the same holds for BINARY(16)
+    ids, whose leading bytes are those digits). Returns (lower, upper) pairs
+    where None means unbounded.
+    """
+    cuts = [f"{i * KEY_SPACE // partitions:04x}" for i in range(1, partitions)]
+    lowers = [None] + cuts
+    uppers = cuts + [None]
+    return list(zip(lowers, uppers))
+
+
+def _range_query(lower, upper, ordered, min_age):
+    where = [('age', '>', min_age)]
+    if lower is not None:
+        where.append(('user_id', '>=', lower))
+    if upper is not None:
+        where.append(('user_id', '<', upper))
+    return build_select(where=where, order_by='user_id' if ordered else None)
+
+
+def _scan_partition(index, lower, upper, batch_size, min_age, ordered, out_queue):
+    """
+    Worker process body: reads the users older than min_age in one user_id
+    range over its own connection (the filter runs in MySQL) and sends them
+    back as (index, batch) tuples.
+    A (index, None) tuple marks the end of the partition.
+    """
+    connection = None
+    cursor = None
+    try:
+        connection = connect_to_prodev()
+        if not connection:
+            return
+        cursor = connection.cursor(dictionary=True)
+        query, params = _range_query(lower, upper, ordered, min_age)
+        cursor.execute(query, params)
+
+        rows = cursor.fetchmany(batch_size)
+        while rows:
+            out_queue.put((index, decode_rows(rows)))
+            rows = cursor.fetchmany(batch_size)
+
+    except mysql.connector.Error as err:
+        print(f"Error scanning partition {index}: {err}")
+    finally:
+        try:
+            if connection:
+                release(connection, cursor)
+        finally:
+            out_queue.put((index, None))
+
+
+def _drain(q, workers, pending):
+    """
+    Yields (index, batch) items from q until every index in `pending` has
+    sent its end marker. Stops early if a worker died without one.
+    """
+    while pending:
+        try:
+            index, batch = q.get(timeout=1)
+        except queue.Empty:
+            if all(workers[index].exitcode is not None for index in pending):
+                print(f"Partitions {sorted(pending)} ended without finishing")
+                return
+            continue
+        if batch is None:
+            pending.discard(index)
+        else:
+            yield index, batch
+
+
+def partitioned_scan(batch_size, workers=None, ordered=False, min_age=25):
+    """
+    Scans user_data in parallel: the user_id key space is split into one
+    range per worker, and each worker process reads its range over its own
+    connection. Yields lists of users older than min_age.
+    Unordered mode yields batches as soon as any worker produces them;
+    ordered mode yields them in user_id order, one partition after another.
+    Queues between workers and the caller are bounded, so a slow consumer
+    pauses the workers instead of buffering the table in memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    bounds = partition_bounds(workers)
+    if ordered:
+        queues = [multiprocessing.Queue(QUEUE_DEPTH) for _ in bounds]
+    else:
+        shared = multiprocessing.Queue(QUEUE_DEPTH * workers)
+        queues = [shared] * workers
+
+    processes = [
+        multiprocessing.Process(
+            target=_scan_partition,
+            args=(index, lower, upper, batch_size, min_age, ordered, queues[index]),
+            daemon=True
+        )
+        for index, (lower, upper) in enumerate(bounds)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        if ordered:
+            for index, q in enumerate(queues):
+                for _, batch in _drain(q, processes, {index}):
+                    yield batch
+        else:
+            for _, batch in _drain(queues[0], processes, set(range(workers))):
+                yield batch
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        for q in set(queues):
+            q.cancel_join_thread()
+            q.close()
+
+
+def parallel_batch_processing(batch_size, workers=None, ordered=False):
+    """
+    Parallel counterpart of batch_processing(): prints users over the age of 25
+    using one worker process per user_id range.
+    """
+    for batch in partitioned_scan(batch_size, workers, ordered):
+        for user in batch:
+            print(user)
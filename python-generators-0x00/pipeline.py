@@ -0,0 +1,152 @@
+import queue
+import threading
+from itertools import chain, islice
+from prefetch import read_ahead
+
+_END = object()
+
+
+class Pipeline:
+    """
+    Lazy chain of stages over a stream of rows or batches.
+    A stage is any function that takes an iterable and returns an iterable;
+    nothing is read from the source until the pipeline is iterated or run.
+
+        Pipeline(stream_users()).then(filter_rows(lambda u: u['age'] > 25)) \\
+            .then(project('name', 'email')).run(print)
+    """
+
+    def __init__(self, source):
+        self._stream = source
+
+    def then(self, stage):
+        """
+        Appends a stage and returns the pipeline for chaining.
+        """
+        self._stream = stage(self._stream)
+        return self
+
+    def __iter__(self):
+        return iter(self._stream)
+
+    def run(self, consumer=None):
+        """
+        Drains the pipeline, passing every item to consumer if given.
+        Returns the number of items that reached the end.
+        """
+        return sink(consumer)(self._stream)
+
+
+def filter_rows(predicate):
+    """
+    Stage keeping the items for which predicate(item) is true.
+    """
+    return lambda stream: filter(predicate, stream)
+
+
+def map_rows(function):
+    """
+    Stage replacing every item with function(item).
+    """
+    return lambda stream: map(function, stream)
+
+
+def project(*columns):
+    """
+    Stage keeping only the given keys of each dictionary row.
+    """
+    return lambda stream: ({column: row[column] for column in columns} for row in stream)
+
+
+def flatten():
+    """
+    Stage turning a stream of batches into a stream of rows.
+    """
+    return chain.from_iterable
+
+
+def rebatch(size):
+    """
+    Stage grouping a stream of rows into lists of `size` rows (the last may be shorter).
+    Use after flatten() to change the batch size of stream_users_in_batches().
+    """
+    def stage(stream):
+        iterator = iter(stream)
+        batch = list(islice(iterator, size))
+        while batch:
+            yield batch
+            batch = list(islice(iterator, size))
+    return stage
+
+
+def buffer(maxsize):
+    """
+    Stage running everything upstream in a background thread, with at most
+    maxsize items queued. A slow downstream blocks the producer once the
+    queue is full, so memory stays bounded.
+    """
+    return lambda stream: read_ahead(iter(stream), maxsize)
+
+
+def tee(branch, maxsize=16):
+    """
+    Stage forwarding every item downstream and also feeding it to
+    branch(iterable), which runs in its own thread behind a bounded queue.
+    The branch may consume the items itself (e.g. sink(write)) or return an
+    iterable, which is then drained.
+    If the branch falls behind, the main stream waits for it (backpressure).
+    Errors raised by the branch are re-raised in the main stream.
+    """
+    def stage(stream):
+        side = queue.Queue(maxsize=maxsize)
+        errors = []
+        drained = threading.Event()
+
+        def side_items():
+            item = side.get()
+            while item is not _END:
+                yield item
+                item = side.get()
+            drained.set()
+
+        def run_branch():
+            try:
+                result = branch(side_items())
+                if hasattr(result, '__iter__'):
+                    sink()(result)
+            except Exception as err:
+                errors.append(err)
+            finally:
+                # Keep draining so the main stream never blocks on a dead branch.
+                while not drained.is_set() and side.get() is not _END:
+                    pass
+
+        thread = threading.Thread(target=run_branch, name="pipeline-tee", daemon=True)
+        thread.start()
+        try:
+            for item in stream:
+                if errors:
+                    raise errors[0]
+                side.put(item)
+                yield item
+        finally:
+            side.put(_END)
+            thread.join()
+        if errors:
+            raise errors[0]
+    return stage
+
+
+def sink(consumer=None):
+    """
+    Terminal stage: consumes the stream, calling consumer(item) for each item.
+    Returns the number of items consumed.
+    """
+    def stage(stream):
+        count = 0
+        for item in stream:
+            if consumer:
+                consumer(item)
+            count += 1
+        return count
+    return stage
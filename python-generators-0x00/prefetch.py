@@ -0,0 +1,69 @@
+import queue
+import threading
+
+
+class _ProducerError:
+    """
+    Carries an exception raised in the read-ahead thread over to the consumer.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+
+_END = object()
+
+
+def read_ahead(items, depth):
+    """
+    Iterates `items` in a background thread, keeping up to `depth` items
+    (pages, batches, rows) fetched ahead of the consumer so database
+    round-trips overlap with processing. Closing the returned generator stops
+    the thread and closes `items` from that thread.
+    Raises ValueError if depth is less than 1, which would leave the
+    read-ahead unbounded.
+    """
+    if depth < 1:
+        raise ValueError(f"read-ahead depth must be at least 1, got {depth}")
+    return _read_ahead(items, depth)
+
+
+def _read_ahead(items, depth):
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    break
+            else:
+                put(_END)
+        except Exception as err:
+            put(_ProducerError(err))
+        finally:
+            if hasattr(items, 'close'):
+                items.close()
+
+    thread = threading.Thread(target=produce, name="read-ahead", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                break
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
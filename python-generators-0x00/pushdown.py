@@ -0,0 +1,73 @@
+from compact_uuid import encode_id
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+OPERATORS = {
+    '=': '=',
+    '!=': '<>',
+    '<': '<',
+    '<=': '<=',
+    '>': '>',
+    '>=': '>=',
+    'like': 'LIKE',
+    'in': 'IN',
+    'between': 'BETWEEN',
+}
+
+
+def compile_predicates(where):
+    """
+    Compiles declarative predicates into a parameterized SQL condition.
+    `where` is an iterable of (column, operator, value) tuples that are ANDed
+    together; 'in' takes a sequence and 'between' a (low, high) pair.
+    Columns and operators are checked against whitelists, values are always
+    bound as parameters; user_id values are encoded for compact (BINARY(16))
+    tables. Returns (condition, params); condition is '' when
+    there is nothing to filter on.
+    Raises ValueError for unknown columns or operators.
+    """
+    conditions = []
+    params = []
+    for column, operator, value in where or ():
+        if column not in COLUMNS:
+            raise ValueError(f"Unknown column: {column!r}")
+        sql_operator = OPERATORS.get(operator.lower())
+        if sql_operator is None:
+            raise ValueError(f"Unknown operator: {operator!r}")
+        if column == 'user_id':
+            value = [encode_id(item) for item in value] if sql_operator in ('IN', 'BETWEEN') else encode_id(value)
+        if sql_operator == 'IN':
+            values = list(value)
+            if not values:
+                conditions.append("FALSE")
+                continue
+            conditions.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+        elif sql_operator == 'BETWEEN':
+            low, high = value
+            conditions.append(f"{column} BETWEEN %s AND %s")
+            params.extend((low, high))
+        else:
+            conditions.append(f"{column} {sql_operator} %s")
+            params.append(value)
+    return " AND ".join(conditions), params
+
+
+def build_select(columns=None, where=None, order_by=None, cast_age=False, table='user_data'):
+    """
+    Builds a parameterized SELECT over user_data that only returns the
+    requested columns (all of them by default) of the rows matching `where`.
+    cast_age=True has MySQL return age as a DOUBLE instead of a DECIMAL.
+    Returns (query, params).
+    """
+    columns = tuple(columns or COLUMNS)
+    for column in columns + ((order_by,) if order_by else ()):
+        if column not in COLUMNS:
+            raise ValueError(f"Unknown column: {column!r}")
+    condition, params = compile_predicates(where)
+    selected = ["CAST(age AS DOUBLE) AS age" if cast_age and column == 'age' else column for column in columns]
+    query = f"SELECT {', '.join(selected)} FROM {table}"
+    if condition:
+        query += f" WHERE {condition}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query, params
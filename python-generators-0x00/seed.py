@@ -1,12 +1,24 @@
 import mysql.connector
+from mysql.connector import errorcode
 import csv
-import uuid
 import os
+import time
+import db_pool
+import json
+from compact_uuid import USER_ID_BINARY, encode_id
+from csv_source import USER_ID_NAMESPACE, derive_user_id
+from db_pool import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
 
-DB_HOST = os.getenv('DB_HOST', 'localhost')
-DB_USER = os.getenv('DB_USER', 'root')
-DB_PASSWORD = os.getenv('DB_PASSWORD', 'admin')
-DB_NAME = "ALX_prodev_database"
+BATCH_SIZE = int(os.getenv('SEED_BATCH_SIZE', '5000'))
+
+INSERT_QUERY = """
+    INSERT INTO user_data (user_id, name, email, age)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        name = VALUES(name),
+        email = VALUES(email),
+        age = VALUES(age)
+    """
 
 def connect_db():
     """
@@ -38,41 +50,45 @@ def create_database(connection):
     finally:
         cursor.close()
 
-def connect_to_prodev():
+def connect_to_prodev(allow_local_infile=False):
     """
     Connects to the ALX_prodev database in MySQL.
+    Normally the connection is checked out of the shared pool in db_pool.
+    Pass allow_local_infile=True to get a dedicated connection with
+    LOAD DATA LOCAL INFILE enabled.
     Returns the connection object if successful, None otherwise.
     """
+    if not allow_local_infile:
+        connection = db_pool.connect_to_prodev()
+        if connection:
+            print(f"Connected to database {DB_NAME}.")
+        return connection
     try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
+        connection = mysql.connector.connect(allow_local_infile=True, **db_pool.DB_CONFIG)
         print(f"Connected to database {DB_NAME}.")
         return connection
     except mysql.connector.Error as err:
         print(f"Error connecting to {DB_NAME} database: {err}")
         return None
 
-def create_table(connection):
+def create_table(connection, compact=USER_ID_BINARY):
     """
     Creates a table user_data if it does not exist with the required fields.
-    user_id (Primary Key, UUID, Indexed)
+    user_id (Primary Key, UUID, Indexed; BINARY(16) when compact, else VARCHAR(36))
     name (VARCHAR, NOT NULL)
     email (VARCHAR, NOT NULL)
-    age (DECIMAL, NOT NULL)
+    age (DECIMAL, NOT NULL, Indexed)
     """
     cursor = connection.cursor()
     table_name = "user_data"
     create_table_query = f"""
     CREATE TABLE IF NOT EXISTS {table_name} (
-        user_id VARCHAR(36) PRIMARY KEY,
+        user_id {'BINARY(16)' if compact else 'VARCHAR(36)'} PRIMARY KEY,
         name VARCHAR(255) NOT NULL,
         email VARCHAR(255) NOT NULL,
         age DECIMAL(5, 2) NOT NULL,
-        INDEX(email) -- Email index for quick lookups
+        INDEX(email), -- Email index for quick lookups
+        INDEX idx_age (age) -- Age index for pushed-down age filters
     );
     """
     try:
@@ -83,43 +99,269 @@ def create_table(connection):
     finally:
         cursor.close()
 
-def insert_data(connection, csv_file_path):
-    """     
-    Inserts data from a CSV file into the user_data table.
-    It checks if data exists before inserting to avoid duplicates based on user_id.
+def add_age_index(connection):
+    """
+    Adds the idx_age index to a user_data table created before it existed.
+    Does nothing if the index is already there.
     """
     cursor = connection.cursor()
-    insert_query = """
-    INSERT INTO user_data (user_id, name, email, age)
-    VALUES (%s, %s, %s, %s)
-    ON DUPLICATE KEY UPDATE
-        name = VALUES(name),
-        email = VALUES(email),
-        age = VALUES(age);
+    try:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'user_data' AND INDEX_NAME = 'idx_age'",
+            (DB_NAME,)
+        )
+        if cursor.fetchone()[0]:
+            return
+        cursor.execute("ALTER TABLE user_data ADD INDEX idx_age (age)")
+        print("Index idx_age added to user_data.")
+    except mysql.connector.Error as err:
+        print(f"Failed adding age index: {err}")
+    finally:
+        cursor.close()
+
+def insert_rows(connection, rows):
     """
+    Sends a list of (user_id, name, email, age) tuples in a single executemany call.
+    mysql.connector rewrites it into one multi-row INSERT ... ON DUPLICATE KEY UPDATE.
+    With USER_ID_BINARY set, user_ids are packed into 16 bytes on the way in.
+    """
+    if USER_ID_BINARY:
+        rows = [(encode_id(row[0]),) + tuple(row[1:]) for row in rows]
+    cursor = connection.cursor()
     try:
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.DictReader(file)
-            for i, row in enumerate(csv_reader):
-                user_id = row['user_id'] if 'user_id' in row and row['user_id'] else str(uuid.uuid4())
-                name = row['name']
-                email = row['email']
-                age = float(row['age'])
-
-                data_tuple = (user_id, name, email, age)
-                try:
-                    cursor.execute(insert_query, data_tuple)
-                    if (i + 1) % 100 == 0:
-                        print(f"Inserted/Updated {i + 1} rows...")
-                except mysql.connector.Error as err_insert:
-                    print(f"Error inserting row {row}: {err_insert}")
-                    connection.rollback()
-                    break
+        cursor.executemany(INSERT_QUERY, rows)
+    finally:
+        cursor.close()
+
+def load_checkpoint(checkpoint_path, csv_file_path):
+    """
+    Returns the saved checkpoint for csv_file_path, or None when there is none
+    or the CSV file changed since it was written.
+    """
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as file:
+            checkpoint = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+    stat = os.stat(csv_file_path)
+    if checkpoint.get('size') != stat.st_size or checkpoint.get('mtime') != stat.st_mtime:
+        print(f"Ignoring stale checkpoint {checkpoint_path}")
+        return None
+    return checkpoint
+
+def save_checkpoint(checkpoint_path, csv_file_path, offset, row_number):
+    """
+    Atomically records that everything before byte `offset` (row `row_number`)
+    of csv_file_path is committed.
+    """
+    stat = os.stat(csv_file_path)
+    checkpoint = {'offset': offset, 'row_number': row_number, 'size': stat.st_size, 'mtime': stat.st_mtime}
+    temporary_path = f"{checkpoint_path}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary_path, checkpoint_path)
+
+def parse_row(header, line):
+    """
+    Parses one raw CSV line into a (user_id, name, email, age) tuple.
+    Rows without a user_id get a stable id derived from their contents, so a
+    reload of the same file updates rows instead of duplicating them.
+    Raises ValueError for malformed rows.
+    """
+    values = next(csv.reader([line]))
+    if len(values) != len(header):
+        raise ValueError(f"expected {len(header)} fields, got {len(values)}")
+    row = dict(zip(header, values))
+    user_id = row.get('user_id') or derive_user_id(row['name'], row['email'], row['age'])
+    return (user_id, row['name'], row['email'], float(row['age']))
+
+def is_row_error(err):
+    """
+    True when MySQL refused a row for its own contents (bad or oversized
+    values, key conflicts), as opposed to a connection or server problem.
+    """
+    return (isinstance(err, (mysql.connector.DataError, mysql.connector.IntegrityError))
+            or err.errno == errorcode.ER_TRUNCATED_WRONG_VALUE_FOR_FIELD)
+
+def flush_batch(connection, batch, rejects):
+    """
+    Inserts and commits a batch of (row_number, line, data_tuple) entries.
+    If the multi-row insert fails, the batch is retried row by row and the
+    rows MySQL refuses are passed to rejects(row_number, line, error).
+    Any other error is raised with nothing committed, so the batch is retried
+    when the load resumes from its checkpoint.
+    Returns the number of rows stored.
+    """
+    try:
+        insert_rows(connection, [data for _, _, data in batch])
         connection.commit()
-        print("Data insertion complete.")
+        return len(batch)
+    except mysql.connector.Error:
+        connection.rollback()
+
+    stored = 0
+    for row_number, line, data in batch:
+        try:
+            insert_rows(connection, [data])
+            stored += 1
+        except mysql.connector.Error as err_insert:
+            if not is_row_error(err_insert):
+                connection.rollback()
+                raise
+            rejects(row_number, line, err_insert)
+    connection.commit()
+    return stored
+
+def insert_data(connection, csv_file_path, batch_size=BATCH_SIZE, use_load_data=False,
+                checkpoint_path=None, reject_path=None):
+    """
+    Inserts data from a CSV file into the user_data table.
+    Rows are sent in batches of batch_size through executemany and each batch
+    is committed on its own; existing user_ids are updated in place.
+    After every commit the file offset and row number are saved to
+    checkpoint_path (default: <csv>.checkpoint), so a re-run after a crash
+    resumes where the last run stopped. Malformed rows or rows MySQL refuses
+    are appended to reject_path (default: <csv>.rejects) instead of aborting.
+    With use_load_data=True the file is handed to load_data_infile() instead.
+    Progress is reported in rows per second.
+    """
+    if use_load_data:
+        return load_data_infile(connection, csv_file_path)
+
+    checkpoint_path = checkpoint_path or f"{csv_file_path}.checkpoint"
+    reject_path = reject_path or f"{csv_file_path}.rejects"
+    total = 0
+    rejected = 0
+    reject_file = None
+    start = time.perf_counter()
+    try:
+        with open(csv_file_path, 'rb') as file:
+            header_line = file.readline().decode('utf-8')
+            header = next(csv.reader([header_line]))
+
+            pending_rejects = []
+
+            def rejects(row_number, line, error):
+                nonlocal rejected
+                pending_rejects.append(line if line.endswith('\n') else line + '\n')
+                rejected += 1
+                print(f"Rejected row {row_number}: {error}")
+
+            def write_rejects():
+                # Rejects are written together with the checkpoint, so a
+                # resumed run does not record them twice.
+                nonlocal reject_file
+                if not pending_rejects:
+                    return
+                if reject_file is None:
+                    reject_file = open(reject_path, 'a', encoding='utf-8')
+                    if reject_file.tell() == 0:
+                        reject_file.write(header_line)
+                reject_file.writelines(pending_rejects)
+                reject_file.flush()
+                pending_rejects.clear()
+
+            checkpoint = load_checkpoint(checkpoint_path, csv_file_path)
+            row_number = 0
+            if checkpoint:
+                file.seek(checkpoint['offset'])
+                row_number = checkpoint['row_number']
+                print(f"Resuming after row {row_number}.")
+
+            batch = []
+            for raw_line in file:
+                row_number += 1
+                try:
+                    line = raw_line.decode('utf-8')
+                    if not line.strip():
+                        continue
+                    batch.append((row_number, line, parse_row(header, line)))
+                except UnicodeDecodeError as err_decode:
+                    rejects(row_number, raw_line.decode('utf-8', errors='replace'), err_decode)
+                except (ValueError, KeyError, csv.Error) as err_parse:
+                    rejects(row_number, line, err_parse)
+                if len(batch) >= batch_size:
+                    total += flush_batch(connection, batch, rejects)
+                    write_rejects()
+                    save_checkpoint(checkpoint_path, csv_file_path, file.tell(), row_number)
+                    batch = []
+                    elapsed = time.perf_counter() - start
+                    print(f"Inserted/Updated {total} rows ({total / elapsed:.0f} rows/s)...")
+            if batch:
+                total += flush_batch(connection, batch, rejects)
+            write_rejects()
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        elapsed = time.perf_counter() - start
+        print(f"Data insertion complete: {total} rows in {elapsed:.2f}s "
+              f"({total / elapsed if elapsed else 0:.0f} rows/s), {rejected} rejected.")
     except FileNotFoundError:
         print(f"Error: CSV file not found at {csv_file_path}")
     except mysql.connector.Error as err:
         print(f"Failed inserting data: {err}")
+        connection.rollback()
+    finally:
+        if reject_file:
+            reject_file.close()
+
+def derived_user_id_sql():
+    """
+    SQL counterpart of csv_source.derive_user_id() over the @name, @email and
+    @age variables of a LOAD DATA statement: the same UUIDv5 (SHA-1 of the
+    namespace and the raw fields), so both loaders give a row the same id.
+    """
+    digest = f"SHA1(CONCAT(UNHEX('{USER_ID_NAMESPACE.hex}'), @name, CHAR(31), @email, CHAR(31), @age))"
+    variant = f"LPAD(HEX((CONV(SUBSTR({digest}, 17, 2), 16, 10) & 0x3f) | 0x80), 2, '0')"
+    return (
+        f"LOWER(CONCAT(SUBSTR({digest}, 1, 8), '-', SUBSTR({digest}, 9, 4), '-', "
+        f"'5', SUBSTR({digest}, 14, 3), '-', {variant}, SUBSTR({digest}, 19, 2), '-', "
+        f"SUBSTR({digest}, 21, 12)))"
+    )
+
+def load_data_infile(connection, csv_file_path):
+    """
+    Bulk loads a CSV file with LOAD DATA LOCAL INFILE.
+    The connection must be opened with connect_to_prodev(allow_local_infile=True)
+    and the server must have local_infile enabled. Rows without a user_id get
+    the same stable id insert_data() would give them (see derived_user_id_sql),
+    and duplicates replace the existing row, so reloads are idempotent.
+    """
+    try:
+        with open(csv_file_path, 'r', encoding='utf-8') as file:
+            header = next(csv.reader(file))
+    except FileNotFoundError:
+        print(f"Error: CSV file not found at {csv_file_path}")
+        return
+
+    # Every field is read into a variable so ids are derived from the raw text,
+    # not from the DECIMAL the age column would round it to.
+    columns = ", ".join(f"@{column}" for column in header)
+    user_id_expr = derived_user_id_sql()
+    if 'user_id' in header:
+        user_id_expr = f"COALESCE(NULLIF(@user_id, ''), {user_id_expr})"
+    if USER_ID_BINARY:
+        user_id_expr = f"UNHEX(REPLACE({user_id_expr}, '-', ''))"
+    query = f"""
+    LOAD DATA LOCAL INFILE %s
+    REPLACE INTO TABLE user_data
+    CHARACTER SET utf8mb4
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+    LINES TERMINATED BY '\\n'
+    IGNORE 1 LINES
+    ({columns})
+    SET user_id = {user_id_expr}, name = @name, email = @email, age = @age
+    """
+    cursor = connection.cursor()
+    start = time.perf_counter()
+    try:
+        cursor.execute(query, (os.path.abspath(csv_file_path),))
+        connection.commit()
+        elapsed = time.perf_counter() - start
+        print(f"Loaded {cursor.rowcount} rows in {elapsed:.2f}s "
+              f"({cursor.rowcount / elapsed if elapsed else 0:.0f} rows/s).")
+    except mysql.connector.Error as err:
+        print(f"Failed loading data: {err}")
+        connection.rollback()
     finally:
         cursor.close()
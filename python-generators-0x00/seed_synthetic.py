@@ -0,0 +1,202 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import time
+import uuid
+
+CHUNK_SIZE = int(os.getenv('SYNTHETIC_CHUNK_SIZE', '50000'))
+
+FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+    'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+    'Thomas', 'Sarah', 'Charles', 'Karen', 'Amina', 'Kwame', 'Fatou', 'Chinedu',
+    'Aisha', 'Kofi', 'Ngozi', 'Moussa', 'Yuki', 'Hiroshi', 'Mei', 'Wei',
+    'Sofia', 'Mateo', 'Lucia', 'Diego', 'Emma', 'Lucas', 'Chloe', 'Hugo',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+    'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas',
+    'Taylor', 'Moore', 'Jackson', 'Martin', 'Diallo', 'Mensah', 'Okafor', 'Traore',
+    'Ndiaye', 'Kamara', 'Danou', 'Nguyen', 'Tanaka', 'Suzuki', 'Chen', 'Wang',
+    'Rossi', 'Silva', 'Dubois', 'Moreau', 'Schmidt', 'Muller', 'Kowalski', 'Novak',
+)
+EMAIL_DOMAINS = ('gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'example.org')
+AGES = range(18, 101)
+CSV_HEADER = ('user_id', 'name', 'email', 'age')
+
+
+def generate_chunk(chunk_index, rows, seed=0, chunk_size=CHUNK_SIZE):
+    """
+    Generates `rows` (user_id, name, email, age) tuples for one chunk.
+    Each column is drawn in a single call (choices(k=...), randbytes) rather
+    than row by row. The chunk's generator is seeded from (seed, chunk_index),
+    so the output is identical whatever the number of worker processes.
+    """
+    rng = random.Random(seed * 1000003 + chunk_index)
+    first_names = rng.choices(FIRST_NAMES, k=rows)
+    last_names = rng.choices(LAST_NAMES, k=rows)
+    domains = rng.choices(EMAIL_DOMAINS, k=rows)
+    ages = rng.choices(AGES, k=rows)
+    raw_ids = rng.randbytes(16 * rows)
+    first_row = chunk_index * chunk_size
+    return [
+        (
+            str(uuid.UUID(bytes=raw_ids[16 * i:16 * i + 16], version=4)),
+            f"{first} {last}",
+            f"{first}.{last}{first_row + i}@{domain}".lower(),
+            age,
+        )
+        for i, (first, last, domain, age) in enumerate(zip(first_names, last_names, domains, ages))
+    ]
+
+
+def _generate_chunk(args):
+    return generate_chunk(*args)
+
+
+def _chunk_args(total_rows, seed, chunk_size):
+    return [
+        (index, min(chunk_size, total_rows - index * chunk_size), seed, chunk_size)
+        for index in range((total_rows + chunk_size - 1) // chunk_size)
+    ]
+
+
+def _run_chunks(task, chunks, workers):
+    """
+    Runs task over chunk arguments in `workers` processes (in-process when
+    workers is 1), yielding results in chunk order.
+    """
+    if workers == 1 or len(chunks) <= 1:
+        yield from map(task, chunks)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(task, chunks)
+
+
+def generate_users(total_rows, seed=0, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields chunks (lists of row tuples) totalling total_rows, generated in
+    parallel by `workers` processes and returned in a deterministic order.
+    """
+    yield from _run_chunks(_generate_chunk, _chunk_args(total_rows, seed, chunk_size), workers)
+
+
+def _report(done, start, verb):
+    elapsed = time.perf_counter() - start
+    print(f"{verb} {done} rows ({done / elapsed if elapsed else 0:.0f} rows/s)...")
+
+
+def write_csv(csv_file_path, total_rows, seed=0, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Writes total_rows synthetic users to a single CSV file in the
+    user_data.csv format, with an extra leading user_id column that
+    seed.insert_data keeps.
+    """
+    start = time.perf_counter()
+    written = 0
+    with open(csv_file_path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        writer.writerow(CSV_HEADER)
+        for chunk in generate_users(total_rows, seed, workers, chunk_size):
+            writer.writerows(chunk)
+            written += len(chunk)
+            _report(written, start, "Generated")
+    return written
+
+
+def _write_part(args):
+    directory, chunk_index = args[0], args[1]
+    path = os.path.join(directory, f"user_data-{chunk_index:05d}.csv")
+    rows = generate_chunk(*args[1:])
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file, quoting=csv.QUOTE_ALL, lineterminator='\n')
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
+    return len(rows)
+
+
+def write_csv_parts(directory, total_rows, seed=0, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Writes total_rows synthetic users as one CSV file per chunk in
+    `directory`. Every worker writes its own files, so nothing is shipped
+    back to the parent process and throughput scales with cores.
+    """
+    os.makedirs(directory, exist_ok=True)
+    chunks = [(directory,) + args for args in _chunk_args(total_rows, seed, chunk_size)]
+    start = time.perf_counter()
+    written = 0
+    for rows in _run_chunks(_write_part, chunks, workers):
+        written += rows
+        _report(written, start, "Generated")
+    return written
+
+
+def _insert_part(args):
+    import seed as seed_module
+
+    connection = seed_module.db_pool.connect_to_prodev()
+    if not connection:
+        # Returning 0 would let the load report success with this chunk missing.
+        raise ConnectionError(f"could not connect to {seed_module.DB_NAME} to insert chunk {args[0]}")
+    try:
+        rows = generate_chunk(*args)
+        seed_module.insert_rows(connection, rows)
+        connection.commit()
+        return len(rows)
+    finally:
+        connection.close()
+
+
+def insert_synthetic(total_rows, seed=0, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Bulk inserts total_rows synthetic users straight into user_data. Each
+    worker generates a chunk and sends it with seed.insert_rows over its own
+    pooled connection, committing once per chunk.
+    Raises ConnectionError if a worker cannot connect; chunks already
+    committed stay in the table.
+    """
+    start = time.perf_counter()
+    inserted = 0
+    for rows in _run_chunks(_insert_part, _chunk_args(total_rows, seed, chunk_size), workers):
+        inserted += rows
+        _report(inserted, start, "Inserted")
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic user_data rows for load testing.")
+    parser.add_argument('rows', type=int, help="number of users to generate")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (same seed, same rows)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--csv', metavar='PATH', help="write a single CSV file")
+    target.add_argument('--csv-dir', metavar='DIR', help="write one CSV file per chunk, in parallel")
+    target.add_argument('--mysql', action='store_true', help="insert into user_data directly")
+    args = parser.parse_args()
+
+    if args.csv:
+        write_csv(args.csv, args.rows, args.seed, args.workers, args.chunk_size)
+        return
+    if args.csv_dir:
+        write_csv_parts(args.csv_dir, args.rows, args.seed, args.workers, args.chunk_size)
+        return
+
+    import seed as seed_module
+    connection = seed_module.connect_to_prodev()
+    if not connection:
+        return
+    try:
+        seed_module.create_table(connection)
+    finally:
+        connection.close()
+    try:
+        insert_synthetic(args.rows, args.seed, args.workers, args.chunk_size)
+    except ConnectionError as err:
+        print(f"Synthetic load aborted: {err}")
+
+
+if __name__ == "__main__":
+    main()
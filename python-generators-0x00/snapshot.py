@@ -0,0 +1,229 @@
+import json
+import math
+import mmap
+import mysql.connector
+import os
+import sys
+import time
+import uuid
+from array import array
+from db_pool import connect_to_prodev
+from pushdown import build_select
+
+batch_processing = __import__('1-batch_processing')
+
+SNAPSHOT_VERSION = 1
+EXPORT_BATCH_SIZE = int(os.getenv('SNAPSHOT_BATCH_SIZE', '10000'))
+STRING_COLUMNS = ('name', 'email')
+FINGERPRINT_QUERY = (
+    "SELECT COUNT(*), COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', HEX(user_id), name, email, age))), 0) "
+    "FROM user_data"
+)
+
+
+def table_fingerprint(connection):
+    """
+    Returns what identifies the current contents of user_data: its row count
+    and an order-independent checksum of every row. Both are computed from the
+    rows themselves, so any insert, update or delete shows up immediately
+    (information_schema's UPDATE_TIME is cached by MySQL and can lag by hours).
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(FINGERPRINT_QUERY)
+        row_count, checksum = cursor.fetchone()
+        return {'rows': row_count, 'checksum': int(checksum)}
+    finally:
+        cursor.close()
+
+
+def _stream_columnar(connection, batch_size):
+    """
+    Yields user_data as columnar batches (see to_columnar) read over
+    `connection`. Unlike stream_users_in_batches(), errors are raised, so a
+    failed read cannot pass for the end of the table.
+    """
+    cursor = connection.cursor()
+    try:
+        query, params = build_select(cast_age=True)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield batch_processing.to_columnar(rows)
+    finally:
+        cursor.close()
+
+
+def export_snapshot(directory, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Streams user_data once into a columnar snapshot in `directory`:
+      user_id.bin            16 bytes per row
+      age.f64                one float64 per row
+      name.off / email.off   uint64 offsets (rows + 1) into
+      name.heap / email.heap the UTF-8 encoded strings
+      meta.json              row count, byte order and table fingerprint
+    The fingerprint and the rows are read in one consistent-snapshot
+    transaction. meta.json is only written once every row has been exported.
+    Returns the number of rows exported, or None on error.
+    """
+    connection = connect_to_prodev()
+    if not connection:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, 'meta.json')
+    if os.path.exists(meta_path):
+        # A failed re-export must not leave the old metadata describing new files.
+        os.remove(meta_path)
+    files = {
+        name: open(os.path.join(directory, name), 'wb')
+        for name in ('user_id.bin', 'age.f64', 'name.off', 'name.heap', 'email.off', 'email.heap')
+    }
+    heap_sizes = dict.fromkeys(STRING_COLUMNS, 0)
+    rows = 0
+    start = time.perf_counter()
+    try:
+        connection.start_transaction(consistent_snapshot=True, isolation_level='REPEATABLE READ', readonly=True)
+        fingerprint = table_fingerprint(connection)
+        for column in STRING_COLUMNS:
+            array('Q', [0]).tofile(files[f'{column}.off'])
+        for batch in _stream_columnar(connection, batch_size):
+            files['user_id.bin'].write(b''.join(uuid.UUID(user_id).bytes for user_id in batch['user_id']))
+            batch['age'].tofile(files['age.f64'])
+            for column in STRING_COLUMNS:
+                encoded = [value.encode('utf-8') for value in batch[column]]
+                offsets = array('Q')
+                position = heap_sizes[column]
+                for value in encoded:
+                    position += len(value)
+                    offsets.append(position)
+                files[f'{column}.heap'].write(b''.join(encoded))
+                offsets.tofile(files[f'{column}.off'])
+                heap_sizes[column] = position
+            rows += len(batch['age'])
+        connection.commit()
+    except mysql.connector.Error as err:
+        print(f"Error exporting user_data snapshot: {err}")
+        return None
+    finally:
+        for file in files.values():
+            file.close()
+        connection.close()
+
+    if rows != fingerprint['rows']:
+        print(f"Snapshot incomplete: exported {rows} of {fingerprint['rows']} rows.")
+        return None
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'rows': rows,
+        'byteorder': sys.byteorder,
+        'fingerprint': fingerprint,
+        'exported_at': time.time(),
+    }
+    with open(meta_path, 'w', encoding='utf-8') as file:
+        json.dump(meta, file, indent=2)
+    print(f"Exported {rows} rows to {directory} in {time.perf_counter() - start:.2f}s.")
+    return rows
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot written by export_snapshot().
+    Columns are exposed as memoryviews over the mapped files, so scans run
+    over the page cache without copying or re-querying MySQL.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as file:
+            self.meta = json.load(file)
+        if self.meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {self.meta.get('version')}")
+        if self.meta['byteorder'] != sys.byteorder:
+            raise ValueError(f"Snapshot was written on a {self.meta['byteorder']}-endian machine")
+        self.directory = directory
+        self._maps = []
+        self.user_ids = self._map('user_id.bin')
+        self.ages = self._map('age.f64', 'd')
+        self._offsets = {column: self._map(f'{column}.off', 'Q') for column in STRING_COLUMNS}
+        self._heaps = {column: self._map(f'{column}.heap') for column in STRING_COLUMNS}
+
+    def _map(self, name, fmt='B'):
+        with open(os.path.join(self.directory, name), 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(b'').cast(fmt)
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(fmt)
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def _string(self, column, index):
+        offsets = self._offsets[column]
+        return bytes(self._heaps[column][offsets[index]:offsets[index + 1]]).decode('utf-8')
+
+    def row(self, index):
+        """
+        Returns row `index` as a dictionary shaped like a user_data row.
+        """
+        return {
+            'user_id': str(uuid.UUID(bytes=bytes(self.user_ids[16 * index:16 * index + 16]))),
+            'name': self._string('name', index),
+            'email': self._string('email', index),
+            'age': self.ages[index],
+        }
+
+    def average_age(self):
+        """
+        Average of the age column, computed straight off the mapped file.
+        """
+        return math.fsum(self.ages) / len(self) if len(self) else 0
+
+    def count_older_than(self, age):
+        """
+        Number of users strictly older than `age`.
+        """
+        return sum(map(float(age).__lt__, self.ages))
+
+    def is_fresh(self, connection=None):
+        """
+        True if user_data still has the row count and row checksum it had
+        when the snapshot was exported. This reads the whole table, but far
+        less than a re-export does.
+        """
+        owned = connection is None
+        connection = connection or connect_to_prodev()
+        if not connection:
+            return False
+        try:
+            return table_fingerprint(connection) == self.meta['fingerprint']
+        finally:
+            if owned:
+                connection.close()
+
+    def close(self):
+        views = [self.user_ids, self.ages, *self._offsets.values(), *self._heaps.values()]
+        for view in views:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def open_snapshot(directory):
+    """
+    Memory-maps the snapshot in `directory`.
+    """
+    return Snapshot(directory)
+
+
+if __name__ == "__main__":
+    export_snapshot(sys.argv[1] if len(sys.argv) > 1 else 'user_data_snapshot')
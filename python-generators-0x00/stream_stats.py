@@ -0,0 +1,201 @@
+import mysql.connector
+import math
+from heapq import merge
+from operator import mul
+from db_pool import connect_to_prodev
+
+stream_ages = __import__('4-stream_ages')
+
+
+class TDigest:
+    """
+    Merging t-digest sketch for approximate percentiles in bounded memory.
+    Incoming values are buffered and periodically folded into at most
+    ~compression centroids, keeping centroids small near the tails so
+    extreme percentiles stay accurate.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.count = 0
+        self._centroids = []
+        self._buffer = []
+
+    def update(self, values):
+        """
+        Adds a chunk of values to the sketch.
+        """
+        self._buffer.extend(values)
+        self.count += len(values)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def _scale(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        points = merge(self._centroids, ((value, 1) for value in self._buffer))
+        self._buffer = []
+
+        centroids = []
+        mean, weight = next(points)
+        weight_so_far = 0
+        k_lower = self._scale(0.0)
+        for point_mean, point_weight in points:
+            if self._scale((weight_so_far + weight + point_weight) / self.count) - k_lower <= 1:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                centroids.append((mean, weight))
+                weight_so_far += weight
+                k_lower = self._scale(weight_so_far / self.count)
+                mean, weight = point_mean, point_weight
+        centroids.append((mean, weight))
+        self._centroids = centroids
+
+    def percentile(self, p, minimum=None, maximum=None):
+        """
+        Returns the approximate p-th percentile (0-100), or None if empty.
+        Given the exact minimum and maximum of the data (StreamingStats tracks
+        them), the tails are interpolated out to them instead of stopping at
+        the outermost centroid means.
+        """
+        self._compress()
+        if not self._centroids:
+            return None
+        centroids = self._centroids
+        first_mean, first_weight = centroids[0]
+        last_mean, last_weight = centroids[-1]
+        low = first_mean if minimum is None else minimum
+        high = last_mean if maximum is None else maximum
+
+        target = p / 100 * self.count
+        if target <= first_weight / 2:
+            return low + (first_mean - low) * target / (first_weight / 2)
+        if target >= self.count - last_weight / 2:
+            return high - (high - last_mean) * (self.count - target) / (last_weight / 2)
+        cumulative = first_weight
+        previous_mean, previous_center = first_mean, first_weight / 2
+        for mean, weight in centroids[1:]:
+            center = cumulative + weight / 2
+            if target <= center:
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_mean, previous_center = mean, center
+            cumulative += weight
+        return last_mean
+
+
+class StreamingStats:
+    """
+    One-pass count, mean, variance, min and max over chunks of values.
+    Each chunk is reduced with C-level builtins (fsum, map, min, max) and
+    merged into the running totals with Chan's parallel variance formula,
+    so the cost per value stays out of the interpreter loop.
+    Percentiles come from an embedded TDigest.
+    """
+
+    def __init__(self, compression=100):
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0
+        self.digest = TDigest(compression)
+
+    def update(self, chunk):
+        """
+        Folds a list of floats into the running statistics.
+        """
+        n = len(chunk)
+        if not n:
+            return
+        chunk_sum = math.fsum(chunk)
+        chunk_mean = chunk_sum / n
+        chunk_m2 = max(math.fsum(map(mul, chunk, chunk)) - chunk_sum * chunk_mean, 0.0)
+
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+        chunk_min, chunk_max = min(chunk), max(chunk)
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        self.digest.update(chunk)
+
+    @property
+    def variance(self):
+        """
+        Population variance, matching MySQL's VAR_POP().
+        """
+        return self._m2 / self.count if self.count else 0.0
+
+    def summary(self, percentiles=()):
+        """
+        Returns the statistics as a dictionary.
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else 0.0,
+            'variance': self.variance,
+            'stddev': math.sqrt(self.variance),
+            'min': self.min,
+            'max': self.max,
+            'percentiles': {p: self.digest.percentile(p, self.min, self.max) for p in percentiles},
+        }
+
+
+def aggregate_ages_in_db():
+    """
+    Lets MySQL compute the exact aggregates over user_data.age in one query.
+    Returns the same dictionary shape as StreamingStats.summary(), or None on error.
+    """
+    connection = connect_to_prodev()
+    if not connection:
+        return None
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "SELECT COUNT(age), AVG(age), VAR_POP(age), MIN(age), MAX(age) FROM user_data"
+        )
+        count, mean, variance, minimum, maximum = cursor.fetchone()
+        variance = float(variance or 0)
+        return {
+            'count': count,
+            'mean': float(mean or 0),
+            'variance': variance,
+            'stddev': math.sqrt(variance),
+            'min': None if minimum is None else float(minimum),
+            'max': None if maximum is None else float(maximum),
+            'percentiles': {},
+        }
+    except mysql.connector.Error as err:
+        print(f"Error aggregating ages: {err}")
+        return None
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def age_statistics(percentiles=(), batch_size=stream_ages.AGE_BATCH_SIZE, pushdown=True, compression=100):
+    """
+    Computes statistics over user ages.
+    When no percentiles are requested and pushdown is enabled the exact
+    aggregates are computed by MySQL; otherwise the ages are streamed in
+    fetchmany chunks through StreamingStats in bounded memory.
+    """
+    if pushdown and not percentiles:
+        return aggregate_ages_in_db()
+    stats = StreamingStats(compression)
+    for chunk in stream_ages.stream_user_ages_in_batches(batch_size):
+        stats.update(chunk)
+    return stats.summary(percentiles)
+
+
+if __name__ == "__main__":
+    print(age_statistics(percentiles=(50, 90, 99)))
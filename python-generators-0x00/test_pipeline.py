@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Tests for pipeline.py"""
+import threading
+import time
+import unittest
+from pipeline import Pipeline, buffer, filter_rows, flatten, project, rebatch, sink, tee
+
+
+def users(count):
+    """Batches of dictionary rows shaped like stream_users_in_batches() output."""
+    rows = [{'user_id': str(i), 'name': f"n{i}", 'email': f"e{i}", 'age': 20 + i % 60} for i in range(count)]
+    return [rows[i:i + 10] for i in range(0, count, 10)]
+
+
+class TestStages(unittest.TestCase):
+    """Single-threaded stages."""
+
+    def test_filter_project_rebatch(self):
+        """Stages compose lazily into the expected output."""
+        batches = list(
+            Pipeline(users(100)).then(flatten()).then(filter_rows(lambda user: user['age'] > 25))
+            .then(project('name')).then(rebatch(7))
+        )
+        names = [row['name'] for batch in batches for row in batch]
+        self.assertEqual(names, [f"n{i}" for i in range(100) if 20 + i % 60 > 25])
+        self.assertTrue(all(len(batch) == 7 for batch in batches[:-1]))
+
+    def test_run_counts_items(self):
+        """run() drains the pipeline and returns the item count."""
+        seen = []
+        self.assertEqual(Pipeline(users(30)).then(flatten()).run(seen.append), 30)
+        self.assertEqual(len(seen), 30)
+
+
+class TestThreadedStages(unittest.TestCase):
+    """buffer() and tee() across threads."""
+
+    def test_buffer_preserves_order(self):
+        """Items cross the thread boundary in order."""
+        self.assertEqual(list(Pipeline(range(500)).then(buffer(8))), list(range(500)))
+
+    def test_tee_feeds_branch_and_main_stream(self):
+        """Both the branch and the main stream see every item."""
+        side = []
+        main = list(Pipeline(range(200)).then(tee(sink(side.append), maxsize=4)))
+        self.assertEqual(main, list(range(200)))
+        self.assertEqual(side, list(range(200)))
+
+    def test_tee_backpressure(self):
+        """A slow branch holds the main stream back to the queue size."""
+        started = threading.Event()
+        released = threading.Event()
+
+        def slow(items):
+            for _ in items:
+                started.set()
+                released.wait(5)
+
+        stream = iter(Pipeline(range(1000)).then(tee(slow, maxsize=4)))
+        taken = []
+        reader = threading.Thread(target=lambda: taken.extend(stream), daemon=True)
+        reader.start()
+        self.assertTrue(started.wait(5))
+        time.sleep(0.2)
+        # One item held by the branch, maxsize queued, one blocked in put().
+        self.assertLessEqual(len(taken), 1 + 4 + 1)
+        released.set()
+        reader.join(5)
+        self.assertEqual(len(taken), 1000)
+
+    def test_tee_branch_error_is_raised_in_main_stream(self):
+        """A failing branch stops the main stream with its error."""
+        def failing(items):
+            for item in items:
+                if item == 10:
+                    raise RuntimeError("branch failed")
+
+        with self.assertRaisesRegex(RuntimeError, "branch failed"):
+            list(Pipeline(range(1000)).then(tee(failing, maxsize=2)))
+
+    def test_tee_branch_stopping_early_does_not_block(self):
+        """A branch that returns early leaves the main stream running."""
+        def first_only(items):
+            next(iter(items))
+
+        self.assertEqual(len(list(Pipeline(range(500)).then(tee(first_only, maxsize=2)))), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Tests for prefetch.py"""
+import threading
+import time
+import unittest
+from prefetch import read_ahead
+
+
+class TestReadAhead(unittest.TestCase):
+    """Ordering, bounds, errors and shutdown of read_ahead()."""
+
+    def test_yields_every_item_in_order(self):
+        """The consumer sees exactly the source's items."""
+        self.assertEqual(list(read_ahead(iter(range(100)), 4)), list(range(100)))
+
+    def test_producer_stays_within_depth(self):
+        """The background thread never runs more than depth items ahead."""
+        produced = []
+
+        def source():
+            for item in range(100):
+                produced.append(item)
+                yield item
+
+        items = read_ahead(source(), 3)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.1)
+        # One item consumed, `depth` queued and one blocked in put().
+        self.assertLessEqual(len(produced), 1 + 3 + 1)
+        items.close()
+
+    def test_producer_error_reaches_consumer(self):
+        """An exception in the source is re-raised after the items before it."""
+        def source():
+            yield 1
+            raise ValueError("broken page")
+
+        items = read_ahead(source(), 2)
+        self.assertEqual(next(items), 1)
+        with self.assertRaisesRegex(ValueError, "broken page"):
+            next(items)
+
+    def test_close_stops_thread_and_closes_source(self):
+        """Closing early joins the thread and closes the source generator."""
+        closed = threading.Event()
+
+        def source():
+            try:
+                for item in range(1000):
+                    yield item
+            finally:
+                closed.set()
+
+        before = threading.active_count()
+        items = read_ahead(source(), 2)
+        next(items)
+        items.close()
+        self.assertTrue(closed.is_set())
+        self.assertEqual(threading.active_count(), before)
+
+    def test_depth_must_be_positive(self):
+        """A depth below 1 would mean an unbounded queue, so it is refused up front."""
+        for depth in (0, -1):
+            with self.subTest(depth=depth), self.assertRaises(ValueError):
+                read_ahead(iter(range(3)), depth)
+
+
+if __name__ == '__main__':
+    unittest.main()